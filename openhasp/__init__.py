@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import contextlib
+import contextvars
+import hashlib
+import io
 import json
 import math
+import os
 from dataclasses import dataclass, field, fields
 from enum import Enum
 from typing import Annotated
 
-import yaml
+from openhasp.automation import (
+    HASSConfiguration,
+    MatrixAutomation,
+    PageLoaderAutomation,
+    router_yaml,
+)
 
-from openhasp.automation import HASSConfiguration
-
-from . import icons, styling, types
+from . import columnar, emitter, icons, ids, spatial, styling, types, validation
 
 #
 # Plates
@@ -34,6 +42,11 @@ class PlateCollection:
             jsonl[name] = plate.jsonl
         return jsonl
 
+    def write_jsonl(self, directory):
+        for name, plate in self.plates.items():
+            with open(f"{directory}/plate-{name}.jsonl", "w") as f:
+                plate.write_jsonl(f)
+
     @property
     def hass_yaml(self):
         return "\n".join([plate.hass_yaml for _, plate in self.plates.items()])
@@ -47,9 +60,39 @@ class PlateCollection:
 
 plates = PlateCollection()
 
+_plate_defaults = contextvars.ContextVar("plate_defaults", default=None)
+
+
+@contextlib.contextmanager
+def plate_defaults(snap_grid=None, id_map_dir=None):
+    """
+    Within the `with` block, create plates that do not say otherwise with
+    `snap_grid` set (see `GridLayout`), and, with an `id_map_dir`, with an
+    ID map persisted in that directory (see `ids.IdMap`). `build` uses this
+    to apply its options to the plate modules it imports.
+    """
+    defaults = dict(_plate_defaults.get() or {})
+    if snap_grid is not None:
+        defaults["snap_grid"] = snap_grid
+    if id_map_dir is not None:
+        defaults["id_map_dir"] = id_map_dir
+    token = _plate_defaults.set(defaults)
+    try:
+        yield
+    finally:
+        _plate_defaults.reset(token)
+
+
+def _rows(child):
+    # the JSONL rows of a page child, which encodes to one row or a list
+    rows = child.json
+    return rows if isinstance(rows, list) else [rows]
+
 
 class Plate:
-    def __init__(self, name, w, h, theme=None):
+    def __init__(
+        self, name, w, h, theme=None, router=False, id_map=None, snap_grid=None
+    ):
         self._id_counter = 0
         self.name = name
         self.w = w
@@ -59,38 +102,223 @@ class Plate:
         self.pages = []
         self.automations = []
         self.theme = theme
+        self.router = router
+        self.store = None
+
+        defaults = _plate_defaults.get() or {}
+        if snap_grid is None:
+            snap_grid = defaults.get("snap_grid", False)
+        self.snap_grid = snap_grid
+        if id_map is None and defaults.get("id_map_dir") is not None:
+            id_map = os.path.join(defaults["id_map_dir"], f"ids-{name}.json")
+        self.id_map = ids.IdMap(id_map) if isinstance(id_map, str) else id_map
 
         plates.add(self)
 
     def set_theme(self, theme):
         self.theme = theme
 
-    def id(self):
+    def id(self, obj=None):
+        if self.id_map is not None and obj is not None:
+            # objects added to a page or layout directly have no key yet
+            if obj._key is None:
+                parent = None
+                if obj.parentid is not None:
+                    parent = self.id_map.key_of(obj.page, obj.parentid)
+                obj._key = ids.object_key(obj, parent)
+            return self.id_map.assign(obj.page, obj._key)
+
         self._id_counter += 1
         return self._id_counter
 
     def page(self, layout, title, *args):
         page = Page(self, layout=layout, title=title, *args)
         layout.page = page
+        page._number = len(self.pages)
         self.pages.append(page)
         return page
 
-    def add(self, obj, *args, **kwargs):
+    def insert_page(self, index, layout, title, *args):
+        """
+        Insert a page before page number `index`, renumbering the pages after
+        it, see `reindex_pages`. Add objects to it with `add(..., page=...)`.
+        """
+        page = Page(self, layout=layout, title=title, *args)
+        layout.page = page
+        self.pages.insert(index, page)
+        self.reindex_pages()
+        return page
+
+    def reindex_pages(self):
+        """
+        Renumber pages and their objects after `pages` has been reordered,
+        and rewrite the `pXbY` references to moved objects in the plate's
+        automations.
+        """
+        from .references import automation_attributes, remap
+
+        references = {}
+        for i, page in enumerate(self.pages):
+            page._number = i
+            for child in page.children:
+                if child.page is None or child.page == i:
+                    continue
+                if getattr(child, "id", None) is not None:
+                    references[(child.page, child.id)] = (i, child.id)
+                child.page = i
+
+        if references:
+            for automation in self.automations:
+                for name, value in automation_attributes(automation).items():
+                    setattr(automation, name, remap(value, references))
+
+    def _page(self, page):
+        if page is None:
+            return self.pages[-1]
+        if isinstance(page, int):
+            return self.pages[page]
+        return page
+
+    def add(self, obj, *args, key=None, page=None, **kwargs):
+        """
+        Add `obj` to `page`, a `Page` of this plate or its number, which
+        defaults to the last page. With an ID map, the object keeps the
+        ID previously given to `key`. Without a key, one is derived from the
+        object's parent, class and text (see `ids.object_key`); objects
+        without text are told apart by the order they are added in, so give
+        those a `key` when their ID has to survive edits to the plate.
+        """
+        if key is not None:
+            obj._key = key
+
+        self._adopt(obj)
+        self._page(page).add(obj, *args, **kwargs)
+        return obj
+
+    def add_many(self, placements, key=None, page=None):
+        """
+        Add several objects in one call. Each placement is an object or a
+        tuple of an object and its layout arguments, such as
+        `(obj, c, r, w, h)`, which may end in a dict of keyword arguments as
+        taken by `add`, e.g. `{"key": "clock", "page": 2}`. `page` is the
+        page of placements not giving one. With an ID map and a `key`,
+        objects without a key of their own are keyed by `key` and their
+        position in `placements`, otherwise as in `add`.
+        """
+        objects = []
+        batches = []
+        for i, placement in enumerate(placements):
+            obj, *args = placement if isinstance(placement, tuple) else (placement,)
+            kw = dict(args.pop()) if args and isinstance(args[-1], dict) else {}
+            obj_key = kw.pop("key", None)
+            if obj_key is None and key is not None:
+                obj_key = f"{key} [{i}]"
+            if obj_key is not None:
+                obj._key = obj_key
+
+            self._adopt(obj)
+            target = self._page(kw.pop("page", page))
+            # consecutive placements on the same page are added together
+            if not batches or batches[-1][0] is not target:
+                batches.append((target, []))
+            batches[-1][1].append((obj, *args, kw))
+            objects.append(obj)
+
+        for target, batch in batches:
+            target.add_many(batch)
+        return objects
+
+    def _adopt(self, obj):
+        # objects added through the plate use its current font and text
+        # color, see `set_font`
         obj.plate = self
         if self.text_font is not None:
             obj.styles.set(text_font=self.text_font)
         if self.text_color is not None:
             obj.styles.set(text_color=self.text_color)
-        self.pages[-1].add(obj, *args, **kwargs)
-        return obj
+
+    def compact(self):
+        """
+        Move the plate's objects into a `columnar.ColumnStore`, replacing
+        them on their pages with `columnar.ObjectView`s. Call this once the
+        plate is built: the original objects are no longer part of the plate.
+        """
+        if self.store is None:
+            self.store = columnar.ColumnStore(self)
+
+        for page in self.pages:
+            children = page.layout.children
+            views = {}
+            for i, child in enumerate(children):
+                # views pass as Objects, but are already in a store
+                if isinstance(child, columnar.ObjectView):
+                    continue
+                if isinstance(child, Object):
+                    view = views.get(id(child))
+                    if view is None:
+                        view = views[id(child)] = self.store.add_object(child)
+                    children[i] = view
+        return self.store
+
+    def validate(self, raise_errors=False):
+        """
+        Check the plate's objects and styles against their value ranges,
+        returning the `validation.Violation`s found, or raising them as a
+        `validation.ValidationError` with `raise_errors`.
+        """
+        violations = validation.validate(self)
+        if violations and raise_errors:
+            raise validation.ValidationError(violations)
+        return violations
+
+    def spatial_index(self, cell_size=64):
+        """
+        Index the absolute rectangles of the plate's objects per page, see
+        `spatial.SpatialIndex`.
+        """
+        return spatial.index(self, cell_size=cell_size)
+
+    def drop_occluded(self):
+        """
+        Remove objects that are off their parent or covered by another
+        object, and the automations only referring to them, returning the
+        `spatial.Entry` of each object.
+        """
+        return spatial.drop_occluded(self)
+
+    def draw_cost(self):
+        """
+        Estimate the cost of drawing each page, see `cost.analyze`.
+        """
+        from .cost import analyze
+
+        return analyze(self)
+
+    def hoist(self):
+        """
+        Move objects repeated identically on every content page onto page 0,
+        returning them, see `hoist.hoist`.
+        """
+        from .hoist import hoist
+
+        return hoist(self)
+
+    def retarget(self, name, w, h, fonts=None, font_sizes=None):
+        """
+        Return a copy of this plate for a `w` x `h` screen, see
+        `retarget.retarget`.
+        """
+        from .retarget import retarget
+
+        return retarget(self, name, w, h, fonts=fonts, font_sizes=font_sizes)
 
     def add_automation(self, automation):
         automation.plate = self
         self.automations.append(automation)
 
     def set_font(self, text_font, text_color):
-        self.text_font = text_font
-        self.text_color = text_color
+        self.text_font = types.intern(text_font)
+        self.text_color = types.intern(text_color)
 
     @property
     def json(self):
@@ -98,17 +326,92 @@ class Plate:
             for child in page.children:
                 yield child.json
 
-    @property
-    def jsonl(self):
-        rows = []
+    def iter_rows(self):
+        """
+        Yield the plate's JSONL rows as dicts, in output order.
+        """
         for child in self.json:
             if isinstance(child, list):
-                for j in child:
-                    rows.append(j)
+                yield from child
             else:
-                rows.append(child)
+                yield child
+
+    def iter_jsonl(self, pages=None):
+        """
+        Yield the plate's encoded JSONL one object at a time, for all pages
+        or the given page numbers. Objects cache their encoded rows, so only
+        objects changed since the last export are serialized again; rows of
+        a compacted plate are serialized together, see `compact`.
+        """
+        selected = [
+            page
+            for number, page in enumerate(self.pages)
+            if pages is None or number in pages
+        ]
+        if self.store is not None:
+            self.store.encode(
+                child._row
+                for page in selected
+                for child in page.children
+                if isinstance(child, columnar.ObjectView)
+            )
+        for page in selected:
+            for child in page.children:
+                yield child.jsonl
+
+    def write_jsonl(self, fileobj, pages=None):
+        """
+        Stream the plate's JSONL to `fileobj` as rows are serialized.
+        """
+        separator = ""
+        for line in self.iter_jsonl(pages):
+            fileobj.write(separator)
+            fileobj.write(line)
+            separator = "\n"
+
+    def page_file(self, number):
+        return f"plate-{self.name}-p{number}.jsonl"
 
-        return "\n".join([json.dumps(row) for row in rows])
+    @property
+    def boot_file(self):
+        return f"plate-{self.name}-boot.jsonl"
+
+    def load_pages_on_demand(self, path):
+        """
+        Have Home Assistant load a page's file, as written by `write_pages`,
+        from `path` on the Home Assistant host when the plate navigates to
+        it, clearing the other content pages first. Only page 0 and the
+        visible page are then held on the device.
+        """
+        automation = PageLoaderAutomation(path)
+        self.add_automation(automation)
+        return automation
+
+    def write_pages(self, directory):
+        """
+        Write every page's JSONL to its own file in `directory`, plus a
+        bootstrap file for the device holding page 0 and page 1, which the
+        device shows after booting. Files whose content is unchanged are left
+        alone. Returns the SHA-256 of each file's content by file name.
+        """
+        from .files import write_if_changed
+
+        files = {self.boot_file: (0, 1)}
+        for number in range(len(self.pages)):
+            files[self.page_file(number)] = (number,)
+
+        hashes = {}
+        for filename, pages in files.items():
+            content = io.StringIO()
+            self.write_jsonl(content, pages)
+            content = content.getvalue()
+            write_if_changed(os.path.join(directory, filename), content)
+            hashes[filename] = hashlib.sha256(content.encode()).hexdigest()
+        return hashes
+
+    @property
+    def jsonl(self):
+        return "\n".join(self.iter_jsonl())
 
     @property
     def hass_yaml(self):
@@ -117,18 +420,38 @@ class Plate:
             for child in page.children:
                 if child.has_automations:
                     objects.append(child.hass.yaml)
-        return yaml.dump({self.name: {"objects": objects}})
+        return emitter.dump({self.name: {"objects": objects}})
+
+    def hass_automations(self, router=None):
+        """
+        Return the plate's Home Assistant automations. With `router` (which
+        defaults to the plate's `router` setting), button matrix automations
+        are replaced by a single automation for the plate that subscribes to
+        all of its state topics and dispatches on topic and button.
+        """
+        if router is None:
+            router = self.router
 
-    @property
-    def hass_automations_yaml(self):
         automations = []
+        routed = []
         for a in self.automations:
+            if router and isinstance(a, MatrixAutomation):
+                routed.append(a)
+                continue
+
             y = a.yaml
             if isinstance(y, list):
                 automations.extend(y)
             else:
                 automations.append(y)
-        return yaml.dump([a for a in automations])
+
+        if routed:
+            automations.append(router_yaml(self, routed))
+        return automations
+
+    @property
+    def hass_automations_yaml(self):
+        return emitter.dump(self.hass_automations())
 
 
 #
@@ -141,13 +464,42 @@ class Layout:
     children: list[str] = field(default_factory=list)
 
 
+def _edge(edges, position, size, count):
+    edge = edges.get(position)
+    if edge is None:
+        edge = edges[position] = round(position * size / count)
+    return edge
+
+
 class GridLayout(Layout):
-    def __init__(self, c, r, padding_x=0, padding_y=0):
+    """
+    Places objects on a grid of `c` columns and `r` rows covering the plate.
+
+    With `snap`, cell edges are rounded to whole pixels once per layout and
+    cached, so every object gets integer geometry and adjacent cells share
+    their edges, with the rounding error spread over the grid instead of
+    accumulating at its end. `snap` defaults to the `snap_grid` setting of
+    the layout's plate.
+    """
+
+    def __init__(self, c, r, padding_x=0, padding_y=0, snap=None):
         self.c = c
         self.r = r
         self.padding = (padding_x, padding_y)
+        self.snap = snap
+        self._edges = None
         super().__init__()
 
+    @property
+    def snap(self):
+        if self._snap is None:
+            return self.page.plate.snap_grid
+        return self._snap
+
+    @snap.setter
+    def snap(self, snap):
+        self._snap = snap
+
     @property
     def cell_width(self):
         return math.floor(self.page.plate.w / self.c)
@@ -156,30 +508,78 @@ class GridLayout(Layout):
     def cell_height(self):
         return math.floor(self.page.plate.h / self.r)
 
+    def edges(self):
+        """
+        The pixel edges of the grid's columns and rows, as dicts from grid
+        position to x and y. Whole positions are filled in up front;
+        fractional ones are added as they are used.
+        """
+        w, h = self.page.plate.w, self.page.plate.h
+        if self._edges is None or self._edges[0] != (w, h, self.c, self.r):
+            xs, ys = {}, {}
+            for i in range(math.floor(self.c) + 1):
+                _edge(xs, i, w, self.c)
+            for i in range(math.floor(self.r) + 1):
+                _edge(ys, i, h, self.r)
+            self._edges = ((w, h, self.c, self.r), xs, ys)
+        return self._edges[1], self._edges[2]
+
     def add_internal(self, obj):
         self.children.append(obj)
-        obj.id = self.page.plate.id()
+        obj.id = self.page.plate.id(obj)
         obj._layout = self
         self.children.append(obj)
 
     def add(self, obj, c=None, r=None, w=None, h=None, **kw):
-        padding_x = self.padding[0]
-        padding_y = self.padding[1]
-
-        if kw.get("ignore_padding"):
-            padding_x = 0
-            padding_y = 0
-
-        if c is not None and r is not None and w is not None and h is not None:
-            obj.x = (self.cell_width * c) + padding_x
-            obj.y = (self.cell_height * r) + padding_y
-            obj.w = (self.cell_width * w) - (2 * padding_x)
-            obj.h = (self.cell_height * h) - (2 * padding_y)
-
-        self.children.append(obj)
-        obj.id = self.page.plate.id()
-
-        obj._layout = self
+        self.add_many([(obj, c, r, w, h, kw)])
+
+    def add_many(self, placements):
+        """
+        Add `(obj, c, r, w, h)` placements, each optionally ending in a dict
+        of keyword arguments as taken by `add`, in one pass. The plate, the
+        snap setting and the cell sizes or edges are looked up once for the
+        whole batch.
+        """
+        plate = self.page.plate
+        snap = self.snap
+        if snap:
+            edges = self.edges()
+        else:
+            cell_width, cell_height = self.cell_width, self.cell_height
+
+        for obj, *args in placements:
+            kw = args.pop() if args and isinstance(args[-1], dict) else {}
+            if len(args) == 4 and None not in args:
+                c, r, w, h = args
+                padding_x, padding_y = self.padding
+                if kw.get("ignore_padding"):
+                    padding_x, padding_y = 0, 0
+                if snap:
+                    self._place(
+                        obj, c, r, w, h, round(padding_x), round(padding_y), edges
+                    )
+                else:
+                    obj.x = (cell_width * c) + padding_x
+                    obj.y = (cell_height * r) + padding_y
+                    obj.w = (cell_width * w) - (2 * padding_x)
+                    obj.h = (cell_height * h) - (2 * padding_y)
+
+            self.children.append(obj)
+            obj.id = plate.id(obj)
+            obj._layout = self
+
+    def _place(self, obj, c, r, w, h, padding_x, padding_y, edges=None):
+        xs, ys = edges or self.edges()
+        plate = self.page.plate
+        left = _edge(xs, c, plate.w, self.c)
+        right = _edge(xs, c + w, plate.w, self.c)
+        top = _edge(ys, r, plate.h, self.r)
+        bottom = _edge(ys, r + h, plate.h, self.r)
+
+        obj.x = left + padding_x
+        obj.y = top + padding_y
+        obj.w = right - left - 2 * padding_x
+        obj.h = bottom - top - 2 * padding_y
 
     @property
     def json(self):
@@ -196,6 +596,7 @@ class Page:
         self.plate = plate
         self.title = title
         self._page_added = False
+        self._number = None
         self.set_layout(layout)
 
     def set_layout(self, layout):
@@ -212,10 +613,34 @@ class Page:
 
         self.layout.add(obj, *args, **kwargs)
 
+    def add_many(self, placements):
+        if not self._page_added:
+            self.layout.children.append(Comment(comment=self.title, page=self.number))
+            self._page_added = True
+
+        number = self.number
+        for obj, *_ in placements:
+            obj.page = number
+            obj.plate = self.plate
+
+        if hasattr(self.layout, "add_many"):
+            self.layout.add_many(placements)
+        else:
+            for obj, *args in placements:
+                kw = args.pop() if args and isinstance(args[-1], dict) else {}
+                self.layout.add(obj, *args, **kw)
+
     @property
     def number(self):
-        for i, page in enumerate(self.plate.pages):
-            if page == self:
+        pages = self.plate.pages
+        i = self._number
+        if i is not None and i < len(pages) and pages[i] is self:
+            return i
+
+        # pages were reordered without going through the plate
+        for i, page in enumerate(pages):
+            if page is self:
+                self._number = i
                 return i
         return 0
 
@@ -229,10 +654,38 @@ class Page:
 #
 
 
-@dataclass
-class Object:
+def _compile_encoder(cls):
+    """
+    Generate a function that serializes the public, non-None fields of the
+    dataclass `cls`, so the field reflection happens once per class rather
+    than once per object export.
+    """
+    lines = ["def encode(self):", "    j = {}"]
+    for f in fields(cls):
+        if f.name.startswith("_"):
+            continue
+        lines.append(f"    value = self.{f.name}")
+        lines.append("    if value is not None:")
+        lines.append(f"        j[{f.name!r}] = value")
+    lines.append("    return j")
+
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    encode = namespace["encode"]
+    encode.__qualname__ = f"{cls.__qualname__}._json_encoder"
+    return encode
+
+
+class _Placed:
+    # back references to the plate and layout holding an object; plain slots
+    # rather than dataclass fields, so asdict() and replace() leave them out
+    __slots__ = ("_plate", "_layout")
+
+
+@dataclass(slots=True)
+class Object(_Placed):
     obj: str = "obj"
-    id: Annotated[int, types.ValueRange(1, 254)] = None
+    id: Annotated[int, types.object_id] = None
     page: Annotated[int, types.ValueRange(0, 12)] = None
     groupid: Annotated[int, types.ValueRange(0, 15)] = None
     x: Annotated[int, types.int16] = 0
@@ -258,22 +711,66 @@ class Object:
 
     _hass: HASSConfiguration = None
     _styles: styling.ObjectStyles = None
+    _key: str = None
+    _jsonl: str = field(default=None, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name[0] != "_":
+            self._invalidate()
+
+    def _invalidate(self):
+        """
+        Drop the cached JSONL row and HASS configuration after a change.
+        Call this after mutating a field in place, e.g. appending to
+        `options`.
+        """
+        object.__setattr__(self, "_jsonl", None)
+        # fields are assigned one by one during __init__, so _hass may not
+        # be set yet
+        hass = getattr(self, "_hass", None)
+        if hass is not None:
+            hass.invalidate()
 
     @property
-    def json(self):
-        j = {}
-
-        for f in fields(self):
-            if f.name.startswith("_"):
-                continue
-            value = getattr(self, f.name)
-            if value is not None:
-                j[f.name] = value
+    def plate(self):
+        return getattr(self, "_plate", None)
+
+    @plate.setter
+    def plate(self, plate):
+        self._plate = plate
+
+    @classmethod
+    def _encoder(cls):
+        # looked up in the class' own namespace so subclasses never reuse the
+        # encoder compiled for their parent's field list
+        encoder = cls.__dict__.get("_json_encoder")
+        if encoder is None:
+            encoder = _compile_encoder(cls)
+            cls._json_encoder = encoder
+        return encoder
 
+    @property
+    def json(self):
+        j = self._encoder()(self)
         j.update(self.styles.json)
+        return self._finish_json(j)
 
+    def _finish_json(self, j):
+        # subclasses adjust the encoded row here rather than overriding json,
+        # so the adjustment also applies to rows of a columnar store
         return j
 
+    @property
+    def jsonl(self):
+        # re-resolving the profile invalidates the row if the theme changed
+        self.styles.finalize_styles()
+        if self._jsonl is None:
+            j = self.json
+            rows = j if isinstance(j, list) else [j]
+            self._jsonl = "\n".join(json.dumps(row) for row in rows)
+        return self._jsonl
+
     @property
     def styles(self):
         if not self._styles:
@@ -291,7 +788,7 @@ class Object:
         return self._hass is not None
 
 
-@dataclass
+@dataclass(slots=True)
 class Comment:
     page: Annotated[int, types.ValueRange(0, 12)] = None
     comment: str = None
@@ -303,8 +800,12 @@ class Comment:
             return dict(page=self.page, comment=self.comment)
         return dict(comment=self.comment)
 
+    @property
+    def jsonl(self):
+        return json.dumps(self.json)
 
-@dataclass
+
+@dataclass(slots=True)
 class Button(Object):
     obj: str = "btn"
     toggle: bool = False
@@ -313,13 +814,13 @@ class Button(Object):
     mode: str = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Switch(Object):
     obj: str = "switch"
     val: Annotated[int, types.on_off] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Label(Object):
     obj: str = "label"
     text: str = None
@@ -327,7 +828,7 @@ class Label(Object):
     align: str = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Slider(Object):
     obj: str = "slider"
     val: Annotated[int, types.int16] = 0
@@ -335,7 +836,7 @@ class Slider(Object):
     max: Annotated[int, types.int16] = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Image(Object):
     obj: str = "img"
     src: str = None
@@ -352,7 +853,7 @@ class Image(Object):
 ArcType = Enum("ArcType", ["NORMAL", "SYMMETRICAL", "REVERSE"])
 
 
-@dataclass
+@dataclass(slots=True)
 class Arc(Object):
     obj: str = "arc"
     min: Annotated[int, types.int16] = None
@@ -367,7 +868,7 @@ class Arc(Object):
     end_angle10: Annotated[int, types.angle] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Gauge(Object):
     obj: str = "gauge"
     min: Annotated[int, types.int16] = None
@@ -381,7 +882,7 @@ class Gauge(Object):
     format: Annotated[int, types.uint16] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Bar(Object):
     obj: str = "bar"
     val: Annotated[int, types.int16] = None
@@ -390,7 +891,7 @@ class Bar(Object):
     start_value: Annotated[int, types.int16] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ButtonMatrix(Object):
     obj: str = "btnmatrix"
     options: list = field(default_factory=list)
@@ -401,9 +902,10 @@ class ButtonMatrix(Object):
     def add_row(self, *items):
         self.options.extend(items)
         self.options.append("\n")
+        self._invalidate()
 
 
-@dataclass
+@dataclass(slots=True)
 class Roller(Object):
     obj: str = "roller"
     options: list = field(default_factory=list)
@@ -412,9 +914,7 @@ class Roller(Object):
     rows: Annotated[int, types.int8] = None
     mode: Annotated[int, types.on_off] = None
 
-    @property
-    def json(self):
-        j = super().json
+    def _finish_json(self, j):
         j["options"] = "\n".join((str(i) for i in self.options))
 
         if self.val is not None:
@@ -423,7 +923,7 @@ class Roller(Object):
         return j
 
 
-@dataclass
+@dataclass(slots=True)
 class ColorPicker(Object):
     obj: str = "cpicker"
     scale_width: Annotated[int, types.uint16] = None
@@ -440,28 +940,24 @@ class TabButtonPosition:
     RIGHT = 4
 
 
-@dataclass
+@dataclass(slots=True)
 class Tab(Object):
     obj: str = "tab"
     text: str = None
 
-    @property
-    def json(self):
-        j = super().json
+    def _finish_json(self, j):
         del j["w"]
         del j["h"]
         return j
 
 
-@dataclass
+@dataclass(slots=True)
 class TabView(Object):
     obj: str = "tabview"
     btn_pos: int = TabButtonPosition.TOP
     val: Annotated[int, types.int8] = None
 
-    @property
-    def json(self):
-        j = super().json
+    def _finish_json(self, j):
         del j["w"]
         del j["h"]
         return j
@@ -472,7 +968,7 @@ class TabView(Object):
 #
 
 
-@dataclass
+@dataclass(slots=True)
 class MediaControlsButtonMatrix(ButtonMatrix):
     buttons = [
         "volume_mute",
@@ -494,6 +990,5 @@ class MediaControlsButtonMatrix(ButtonMatrix):
         "forward_media",
     ]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def __post_init__(self):
         self.options = [icons.get(x) if x != "\n" else x for x in self.buttons]
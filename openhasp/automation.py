@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import random
+import hashlib
 import typing
 from dataclasses import dataclass, field
 
-import yaml
+from . import emitter, types
 
 if typing.TYPE_CHECKING:
     from openhasp import Object
@@ -14,29 +14,45 @@ def join(*args):
     return "".join(args)
 
 
-@dataclass
+def content_id(*parts, length=8):
+    """
+    Derive a stable identifier from `parts`, so generated IDs only change
+    when the content they identify changes.
+    """
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode())
+    return digest.hexdigest()[:length]
+
+
+@dataclass(slots=True)
 class HASSConfiguration:
     target: "Object" = None
     properties: typing.MutableMapping[str, str] = field(default_factory=dict)
     events: typing.MutableMapping[str, str] = field(default_factory=dict)
     automations: list = field(default_factory=list)
+    _yaml: dict = field(default=None, repr=False, compare=False)
+
+    def invalidate(self):
+        self._yaml = None
 
     def on(self, event_name, meta):
         if isinstance(meta["entity_id"], tuple):
             meta["entity_id"] = list(meta["entity_id"])
         self.events.setdefault(event_name, []).append(meta)
+        self.invalidate()
 
     def inherit_value_from(self, prop, entity_id, attribute, before="", after=""):
-        self.properties[prop] = (
+        self.properties[prop] = types.intern(
             before
             + "{{ "
             + f'state_attr("{entity_id}", "{attribute}")'
             + " }}"
             + after
         )
+        self.invalidate()
 
     def inherit_value_from_template(self, prop, template):
-        self.properties[prop] = template
+        self.properties[prop] = types.intern(template)
+        self.invalidate()
 
     def on_change(self, service, entity_id, data):
         self.on("changed", {"service": service, "entity_id": entity_id, "data": data})
@@ -49,15 +65,17 @@ class HASSConfiguration:
 
     @property
     def yaml(self):
-        yaml = {
-            "obj": f"p{self.target.page}b{self.target.id}",
-            "properties": self.properties,
-        }
+        if self._yaml is None:
+            yaml = {
+                "obj": f"p{self.target.page}b{self.target.id}",
+                "properties": self.properties,
+            }
 
-        if len(self.events):
-            yaml["event"] = self.events
+            if len(self.events):
+                yaml["event"] = self.events
 
-        return yaml
+            self._yaml = yaml
+        return self._yaml
 
 
 class Scenes:
@@ -67,9 +85,19 @@ class Scenes:
     def add(self, scene):
         self.scenes.append(scene)
 
+    def unique_id(self, name):
+        base = content_id("scene", name, length=10)
+        taken = {s.id for s in self.scenes}
+        scene_id = base
+        count = 1
+        while scene_id in taken:
+            count += 1
+            scene_id = f"{base}_{count}"
+        return scene_id
+
     @property
     def yaml(self):
-        return yaml.dump([s.yaml for s in self.scenes], Dumper=yaml.Dumper)
+        return emitter.dump([s.yaml for s in self.scenes])
 
 
 scenes = Scenes()
@@ -77,11 +105,13 @@ scenes = Scenes()
 
 @dataclass
 class Scene:
-    id: str = field(default_factory=lambda: f"{random.randint(1000000, 10000000)}")
+    id: str = None
     states: dict = field(default_factory=dict)
     name: str = "Generated Scene"
 
     def __post_init__(self):
+        if self.id is None:
+            self.id = scenes.unique_id(self.name)
         scenes.add(self)
 
     def set(self, entity_id, state, **attributes):
@@ -127,24 +157,213 @@ class OpenHASPConfigAutomation(Automation):
         return automation
 
 
-class ButtonMatrixAutomation(Automation):
-    def __init__(self, title, matrix_id, actions):
+class PageLoaderAutomation(Automation):
+    """
+    Loads the JSONL file of the page a plate navigates to with
+    `openhasp.load_pages`, after clearing the plate's other content pages,
+    for plates exported one file per page (see `Plate.write_pages`). `path`
+    is the directory holding the files on the Home Assistant host.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _command(self, keyword, parameters):
+        return {
+            "service": "openhasp.command",
+            "target": {"entity_id": f"openhasp.{self.plate.name}"},
+            "data": {"keyword": keyword, "parameters": parameters},
+        }
+
+    @property
+    def yaml(self):
+        pages = range(1, len(self.plate.pages))
+        return {
+            "id": f"{self.plate.name}_page_loader",
+            "alias": f"{self.plate.name} - Page Loader",
+            "mode": "queued",
+            "trigger": [
+                {
+                    "platform": "mqtt",
+                    "topic": f"hasp/{self.plate.name}/state/page",
+                }
+            ],
+            "condition": [],
+            "action": [
+                {
+                    "choose": [
+                        {
+                            "conditions": [
+                                {
+                                    "condition": "template",
+                                    "value_template": join(
+                                        "{{ ", f"trigger.payload | int == {page}", " }}"
+                                    ),
+                                }
+                            ],
+                            "sequence": [
+                                self._command("clearpage", str(other))
+                                for other in pages
+                                if other != page
+                            ]
+                            + [
+                                {
+                                    "service": "openhasp.load_pages",
+                                    "target": {
+                                        "entity_id": f"openhasp.{self.plate.name}"
+                                    },
+                                    "data": {
+                                        "path": join(
+                                            self.path.rstrip("/"),
+                                            "/",
+                                            self.plate.page_file(page),
+                                        )
+                                    },
+                                },
+                            ],
+                        }
+                        for page in pages
+                    ]
+                }
+            ],
+        }
+
+
+class MatrixAutomation(Automation):
+    """
+    Base class for automations that run actions when a button of a button
+    matrix is pressed. By default one automation is emitted per button and
+    action; with `consolidate=True` a single automation per matrix dispatches
+    on the pressed button with `choose`.
+    """
+
+    def __init__(self, title, matrix_id, actions, consolidate=False):
         self.title = title
         self.matrix_id = matrix_id
         self.actions = actions
+        self.consolidate = consolidate
 
     @property
-    def yaml(self):
-        automations = []
+    def topic(self):
+        return f"hasp/{self.plate.name}/state/{self.matrix_id}"
+
+    def buttons(self):
+        """
+        Yield `(button_id, actions)` for every button of the matrix, where
+        `actions` is the list of Home Assistant actions to run on release.
+        """
+        raise NotImplementedError
+
+    @property
+    def choose(self):
+        return [
+            {
+                "conditions": [
+                    {
+                        "condition": "template",
+                        "value_template": join(
+                            "{{ ", f"trigger.payload_json.val == {button_id}", " }}"
+                        ),
+                    }
+                ],
+                "sequence": actions,
+            }
+            for button_id, actions in self.buttons()
+        ]
+
+    def consolidated_yaml(self, id_prefix, alias):
+        return {
+            "id": join(f"{self.plate.name}", id_prefix, f"{self.matrix_id}"),
+            "alias": join(f"{self.plate.name}", alias, f"({self.matrix_id})"),
+            "mode": "queued",
+            "trigger": [
+                {
+                    "platform": "mqtt",
+                    "topic": self.topic,
+                    "value_template": "{{ value_json.event }}",
+                    "payload": "up",
+                }
+            ],
+            "condition": [],
+            "action": [{"choose": self.choose}],
+        }
+
+
+def router_yaml(plate, automations):
+    """
+    Build one automation that subscribes to every `hasp/<plate>/state/...`
+    topic and dispatches button releases to the actions of the given matrix
+    automations, first on the topic and then on the pressed button.
+    """
+    return {
+        "id": f"{plate.name}_router",
+        "alias": f"{plate.name} - MQTT Router",
+        "mode": "queued",
+        "trigger": [
+            {
+                "platform": "mqtt",
+                "topic": f"hasp/{plate.name}/state/+",
+                "value_template": join(
+                    "{{ ", "value_json.event if value_json is defined else ''", " }}"
+                ),
+                "payload": "up",
+            }
+        ],
+        "condition": [],
+        "action": [
+            {
+                "choose": [
+                    {
+                        "conditions": [
+                            {
+                                "condition": "template",
+                                "value_template": join(
+                                    "{{ ", f"trigger.topic == '{a.topic}'", " }}"
+                                ),
+                            }
+                        ],
+                        "sequence": [{"choose": a.choose}],
+                    }
+                    for a in automations
+                ]
+            }
+        ],
+    }
+
+
+class ButtonMatrixAutomation(MatrixAutomation):
+    def _actions(self, action):
+        actions = action if isinstance(action, list) else [action]
+
+        for action in actions:
+            action = list(action)
+            service = action.pop(0)
+            entity_id = action.pop(0) if len(action) else None
+            data = action.pop(0) if len(action) else None
+
+            result = {"service": service}
+            if entity_id:
+                if isinstance(entity_id, tuple):
+                    entity_id = list(entity_id)
+                result["target"] = {"entity_id": entity_id}
+
+            if data:
+                result["data"] = data
+
+            yield result
+
+    def buttons(self):
         for button_id, action in enumerate(self.actions):
-            actions = action if isinstance(action, list) else [action]
+            yield button_id, list(self._actions(action))
 
-            for count, action in enumerate(actions):
-                action = list(action)
-                service = action.pop(0)
-                entity_id = action.pop(0) if len(action) else None
-                data = action.pop(0) if len(action) else None
+    @property
+    def yaml(self):
+        if self.consolidate:
+            return self.consolidated_yaml("_press_", f"- Button - {self.title} - ")
 
+        automations = []
+        for button_id, actions in self.buttons():
+            for count, action in enumerate(actions):
                 automation = {
                     "id": join(
                         f"{self.plate.name}",
@@ -159,7 +378,7 @@ class ButtonMatrixAutomation(Automation):
                     "trigger": [
                         {
                             "platform": "mqtt",
-                            "topic": f"hasp/{self.plate.name}/state/{self.matrix_id}",
+                            "topic": self.topic,
                         }
                     ],
                     "condition": [
@@ -177,29 +396,32 @@ class ButtonMatrixAutomation(Automation):
                         }
                     ],
                 }
-                automation["action"] = {"service": service}
-                if entity_id:
-                    if isinstance(entity_id, tuple):
-                        entity_id = list(entity_id)
-                    automation["action"]["target"] = {"entity_id": entity_id}
-
-                if data:
-                    automation["action"]["data"] = data
+                automation["action"] = action
 
                 automations.append(automation)
         return automations
 
 
-class MediaPlayerRemoteAutomation(Automation):
-    def __init__(self, title, matrix_id, actions):
-        self.title = title
-        self.matrix_id = matrix_id
-        self.actions = actions
+class MediaPlayerRemoteAutomation(MatrixAutomation):
+    def buttons(self):
+        for button_id, (service, entity_id, data) in enumerate(self.actions):
+            yield button_id, [
+                {
+                    "service": service,
+                    "target": {"entity_id": entity_id},
+                    "data": data,
+                }
+            ]
 
     @property
     def yaml(self):
+        if self.consolidate:
+            return self.consolidated_yaml(
+                "_remote_press_", f" Remote Press {self.title} "
+            )
+
         automations = []
-        for button_id, (service, entity_id, data) in enumerate(self.actions):
+        for button_id, actions in self.buttons():
             automations.append(
                 {
                     "id": join(
@@ -215,7 +437,7 @@ class MediaPlayerRemoteAutomation(Automation):
                     "trigger": [
                         {
                             "platform": "mqtt",
-                            "topic": f"hasp/{self.plate.name}/state/{self.matrix_id}",
+                            "topic": self.topic,
                         }
                     ],
                     "condition": [
@@ -232,13 +454,7 @@ class MediaPlayerRemoteAutomation(Automation):
                             ),
                         }
                     ],
-                    "action": [
-                        {
-                            "service": service,
-                            "target": {"entity_id": entity_id},
-                            "data": data,
-                        }
-                    ],
+                    "action": actions,
                 }
             )
         return automations
@@ -279,7 +495,15 @@ class ArtworkAutomation(Automation):
     @property
     def yaml(self):
         return {
-            "id": f"am-{self.entity_id}-{random.randint(0, 65535)}",
+            "id": join(
+                f"am-{self.entity_id}-",
+                content_id(
+                    self.plate.name,
+                    self.image_id,
+                    self.container_id,
+                    self.trigger_attribute,
+                ),
+            ),
             "alias": self.title,
             "mode": "single",
             "trigger": [
@@ -0,0 +1,210 @@
+import json
+from dataclasses import asdict, dataclass, fields
+
+from . import _rows, styling
+
+# rough heap used on the device by each widget type, in bytes, before its
+# styles and strings
+WIDGET_HEAP = dict(
+    obj=120,
+    btn=140,
+    switch=180,
+    label=160,
+    slider=200,
+    img=160,
+    arc=180,
+    gauge=320,
+    bar=180,
+    btnmatrix=200,
+    roller=280,
+    cpicker=300,
+    tab=150,
+    tabview=400,
+    line=160,
+)
+DEFAULT_WIDGET_HEAP = 150
+
+# heap used per local style property and per character of a string property
+STYLE_PROPERTY_HEAP = 12
+STRING_HEAP = 1
+
+_STYLE_PROPERTIES = frozenset(
+    f.name for f in fields(styling.ObjectStyle) if f.name not in ("part", "state")
+)
+
+
+def style_properties(row):
+    return sum(1 for key in row if styling.style_property(key) in _STYLE_PROPERTIES)
+
+
+def estimate_heap(row):
+    """
+    Estimate the heap an object takes on the device from its JSONL row.
+    """
+    heap = WIDGET_HEAP.get(row["obj"], DEFAULT_WIDGET_HEAP)
+    heap += style_properties(row) * STYLE_PROPERTY_HEAP
+    for key in ("text", "options", "src"):
+        value = row.get(key)
+        if isinstance(value, list):
+            heap += sum(len(str(v)) + 1 for v in value) * STRING_HEAP
+        elif value is not None:
+            heap += (len(str(value)) + 1) * STRING_HEAP
+    return heap
+
+
+def resources(plate):
+    """
+    Measure what `plate` needs on the device: JSONL bytes, object count,
+    estimated heap and style properties per page and per object, heap per
+    widget type, and the Home Assistant templates and automations driving
+    it. Returns a dict that can be written as JSON.
+    """
+    pages = []
+    widgets = {}
+    templates = 0
+    events = 0
+    for number, page in enumerate(plate.pages):
+        seen = set()
+        objects = []
+        summary = dict(page=number, bytes=0, objects=0, heap=0, style_properties=0)
+        for child in page.children:
+            # every child is written, including children listed twice
+            summary["bytes"] += len(child.jsonl.encode()) + 1
+            if id(child) in seen:
+                continue
+            seen.add(id(child))
+
+            rows = _rows(child)
+            if "obj" not in rows[0]:
+                continue
+
+            row = {}
+            for r in rows:
+                row.update(r)
+            heap = estimate_heap(row)
+            properties = style_properties(row)
+            objects.append(
+                dict(
+                    id=row.get("id"),
+                    obj=row["obj"],
+                    bytes=len(child.jsonl.encode()) + 1,
+                    heap=heap,
+                    style_properties=properties,
+                )
+            )
+            summary["objects"] += 1
+            summary["heap"] += heap
+            summary["style_properties"] += properties
+
+            widget = widgets.setdefault(row["obj"], dict(count=0, heap=0))
+            widget["count"] += 1
+            widget["heap"] += heap
+
+            if child.has_automations:
+                templates += len(child.hass.properties)
+                events += sum(len(e) for e in child.hass.events.values())
+
+        summary["object_details"] = objects
+        pages.append(summary)
+
+    return dict(
+        plate=plate.name,
+        bytes=sum(p["bytes"] for p in pages),
+        objects=sum(p["objects"] for p in pages),
+        heap=sum(p["heap"] for p in pages),
+        style_properties=sum(p["style_properties"] for p in pages),
+        templates=templates,
+        events=events,
+        automations=len(plate.hass_automations()),
+        widgets=widgets,
+        pages=pages,
+    )
+
+
+@dataclass(slots=True)
+class Budget:
+    """
+    Limits for a plate; limits left as None are not checked. Object counts,
+    heap and bytes are per plate unless named per page.
+    """
+
+    bytes: int = None
+    page_bytes: int = None
+    objects: int = None
+    page_objects: int = None
+    heap: int = None
+    style_properties: int = None
+    templates: int = None
+    automations: int = None
+
+    @classmethod
+    def from_dict(cls, data):
+        names = {f.name for f in fields(cls)}
+        unknown = set(data) - names
+        if unknown:
+            raise ValueError(f"unknown budget limits: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def check(self, report):
+        """
+        Return a message for every limit `report`, as produced by
+        `resources`, exceeds.
+        """
+        exceeded = []
+
+        def over(name, value, where=""):
+            limit = getattr(self, name)
+            if limit is not None and value > limit:
+                exceeded.append(
+                    f"{report['plate']}{where} {name.replace('_', ' ')} "
+                    f"{value:,} exceeds budget of {limit:,}"
+                )
+
+        for name in ("bytes", "objects", "heap", "style_properties"):
+            over(name, report[name])
+        over("templates", report["templates"])
+        over("automations", report["automations"])
+        for page in report["pages"]:
+            over("page_bytes", page["bytes"], f" page {page['page']}")
+            over("page_objects", page["objects"], f" page {page['page']}")
+        return exceeded
+
+
+class BudgetError(ValueError):
+    def __init__(self, exceeded):
+        self.exceeded = exceeded
+        lines = [f"{len(exceeded)} budget(s) exceeded:"]
+        lines.extend(exceeded)
+        super().__init__("\n".join(lines))
+
+
+def load_budgets(path):
+    """
+    Load budgets from a JSON file holding the default limits, optionally
+    with per plate overrides under `plates`:
+
+        {"heap": 40000, "plates": {"theaterplate": {"page_objects": 40}}}
+
+    Returns a function giving the `Budget` for a plate name.
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    overrides = data.pop("plates", {})
+    default = Budget.from_dict(data)
+
+    def budget_for(name):
+        if name not in overrides:
+            return default
+        return Budget.from_dict({**asdict(default), **overrides[name]})
+
+    return budget_for
+
+
+def summary(report):
+    return (
+        f"{report['plate']}: {report['bytes']:,} bytes, "
+        f"{report['objects']} objects, ~{report['heap']:,} bytes heap, "
+        f"{report['style_properties']} style properties, "
+        f"{report['templates']} templates, {report['automations']} automations"
+    )
@@ -0,0 +1,361 @@
+import hashlib
+import importlib
+import importlib.util
+import json
+import multiprocessing
+import os
+
+import openhasp
+from openhasp import budget, emitter, spatial, validation
+from openhasp.automation import MatrixAutomation
+from openhasp.files import write_if_changed
+
+CACHE_FILE = ".build-cache.json"
+
+
+def _hash_files(paths):
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(path.encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _hash_content(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _python_files(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for name in files:
+            if name.endswith(".py") or name.endswith(".codepoints"):
+                yield os.path.join(root, name)
+
+
+def source_hash(module_name):
+    """
+    Hash the source of a plate module, together with the openhasp package
+    itself so that library and theme changes also invalidate the cache. For
+    a package, every file in the package directory is included.
+    """
+    spec = importlib.util.find_spec(module_name)
+    if spec.submodule_search_locations:
+        paths = [p for d in spec.submodule_search_locations for p in _python_files(d)]
+    else:
+        paths = [spec.origin]
+
+    paths.extend(_python_files(os.path.dirname(openhasp.__file__)))
+    return _hash_files(paths)
+
+
+def write_plate_jsonl(plate, path, previous_hash=None):
+    """
+    Stream the plate's JSONL next to `path` and only replace `path` when the
+    content hash differs from `previous_hash` or from the file on disk,
+    leaving unchanged files (and their mtimes) untouched. Returns the content
+    hash.
+    """
+    digest = hashlib.sha256()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        separator = ""
+        for line in plate.iter_jsonl():
+            chunk = separator + line
+            f.write(chunk)
+            digest.update(chunk.encode())
+            separator = "\n"
+
+    content_hash = digest.hexdigest()
+    unchanged = content_hash == previous_hash and os.path.exists(path)
+    if unchanged and _hash_content(path) == content_hash:
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    return content_hash
+
+
+def build_module(
+    module_name,
+    output_dir,
+    previous=None,
+    hoist=False,
+    fast_budget=None,
+    page_path=None,
+    consolidate_matrices=False,
+    router=False,
+    stable_ids=False,
+    snap_grid=False,
+):
+    """
+    Import a plate module and write the JSONL for every plate it registers.
+    Returns a dict per plate, in the order the plates were registered, with
+    its name, the content hashes of its JSONL and page files and its Home
+    Assistant YAML, and writes a `budget-<plate>.json` resource report (see
+    `openhasp.budget`).
+
+    With `hoist`, objects repeated on every page are first moved onto page 0,
+    and with `fast_budget` plates use the fast variant of their theme. With
+    `page_path`, each page is also written to its own file, loaded on demand
+    from `page_path` on the Home Assistant host (see
+    `openhasp.Plate.load_pages_on_demand`). With `consolidate_matrices`,
+    button matrix automations are emitted as one automation per matrix (see
+    `openhasp.automation.MatrixAutomation`), and with `router` they are
+    replaced by one router automation per plate (see
+    `openhasp.Plate.hass_automations`).
+
+    With `stable_ids`, the module's plates keep their object IDs stable
+    through ID maps stored in `output_dir`, and with `snap_grid` their grid
+    layouts place objects on whole pixels, unless the module says otherwise
+    (see `openhasp.plate_defaults`).
+    """
+    previous = {p["name"]: p for p in (previous or {}).get("plates", [])}
+    # plates replacing one of the same name count as registered by the module
+    before = dict(openhasp.plates.plates)
+    with openhasp.plate_defaults(
+        snap_grid=snap_grid, id_map_dir=output_dir if stable_ids else None
+    ):
+        importlib.import_module(module_name)
+
+    results = []
+    for name, plate in openhasp.plates.plates.items():
+        if before.get(name) is plate:
+            continue
+
+        if hoist:
+            plate.hoist()
+        if router:
+            plate.router = True
+        if consolidate_matrices:
+            for automation in plate.automations:
+                if isinstance(automation, MatrixAutomation):
+                    automation.consolidate = True
+        if fast_budget is not None and plate.theme is not None:
+            plate.set_theme(plate.theme.fast(fast_budget))
+        page_files = {}
+        if page_path is not None:
+            plate.load_pages_on_demand(page_path)
+            page_files = plate.write_pages(output_dir)
+
+        jsonl_hash = write_plate_jsonl(
+            plate,
+            os.path.join(output_dir, f"plate-{name}.jsonl"),
+            previous.get(name, {}).get("jsonl"),
+        )
+        if plate.id_map is not None and plate.id_map.path:
+            plate.id_map.save()
+
+        report = budget.resources(plate)
+        write_if_changed(
+            os.path.join(output_dir, f"budget-{name}.json"),
+            json.dumps(report, indent=2),
+        )
+        pages = [
+            {k: v for k, v in page.items() if k != "object_details"}
+            for page in report["pages"]
+        ]
+
+        results.append(
+            dict(
+                name=name,
+                violations=[str(v) for v in plate.validate()],
+                layout_warnings=spatial.report(plate),
+                resources=dict(report, pages=pages),
+                jsonl=jsonl_hash,
+                page_files=page_files,
+                hass_yaml=plate.hass_yaml,
+                hass_automations_yaml=plate.hass_automations_yaml,
+            )
+        )
+    return results
+
+
+def _apply_options(options):
+    emitter.default_backend = options["yaml_backend"]
+
+
+def _build_module(args):
+    module_name, output_dir, previous, options = args
+    _apply_options(options)
+    return module_name, build_module(
+        module_name,
+        output_dir,
+        previous,
+        hoist=options["hoist"],
+        fast_budget=options["fast_budget"],
+        page_path=options["page_path"],
+        consolidate_matrices=options["consolidate_matrices"],
+        router=options["router"],
+        stable_ids=options["stable_ids"],
+        snap_grid=options["snap_grid"],
+    )
+
+
+def _load_cache(output_dir):
+    try:
+        with open(os.path.join(output_dir, CACHE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_fresh(entry, source, options, output_dir):
+    if not entry or entry.get("source") != source:
+        return False
+
+    if entry.get("options") != options:
+        return False
+
+    for p in entry["plates"]:
+        path = os.path.join(output_dir, f"budget-{p['name']}.json")
+        if not os.path.exists(path):
+            return False
+
+        # the plate, page and boot files have to hold what the build wrote
+        path = os.path.join(output_dir, f"plate-{p['name']}.jsonl")
+        if not os.path.exists(path) or _hash_content(path) != p.get("jsonl"):
+            return False
+
+        for filename, content_hash in p.get("page_files", {}).items():
+            path = os.path.join(output_dir, filename)
+            if not os.path.exists(path) or _hash_content(path) != content_hash:
+                return False
+    return True
+
+
+def build(
+    modules,
+    output_dir="output",
+    jobs=None,
+    use_cache=True,
+    yaml_backend=None,
+    stable_ids=False,
+    snap_grid=False,
+    hoist=False,
+    fast_budget=None,
+    budgets=None,
+    page_path=None,
+    consolidate_matrices=False,
+    router=False,
+    strict=False,
+    log=print,
+):
+    """
+    Build the plates defined in `modules`, serializing independent plate
+    modules in a pool of `jobs` processes (defaults to the CPU count). Each
+    plate's JSONL is written as soon as it is ready, and the combined Home
+    Assistant YAML files are written once every module has finished.
+
+    With `use_cache`, modules whose source (and the openhasp package) are
+    unchanged since the last build are skipped, and output files are only
+    rewritten when their content changes.
+
+    `yaml_backend` selects the `openhasp.emitter` backend used for the Home
+    Assistant YAML. With `stable_ids`, object IDs are kept stable across
+    builds through ID maps stored in `output_dir`. With `snap_grid`, grid
+    layouts place objects on whole pixels (see `openhasp.GridLayout`). With
+    `hoist`, objects repeated on every page are moved onto page 0 (see
+    `openhasp.hoist`). With `fast_budget`, themes are replaced by their fast
+    variant (see `openhasp.cost.fast_theme`). With `page_path`, every page is
+    also written to its own file for loading on demand from that directory
+    on the Home Assistant host. With `consolidate_matrices`, each button
+    matrix gets a single automation dispatching on the pressed button. With
+    `router`, the button matrix automations of each plate are replaced by a
+    single automation dispatching on topic and button.
+
+    Every plate is validated and violations are logged; with `strict`, a
+    `validation.ValidationError` is raised once the build has finished.
+    Objects that are off-screen or hidden are logged as well.
+
+    The resources each plate needs are logged; `budgets` is a
+    `budget.Budget`, or a function returning one for a plate name, and a
+    `budget.BudgetError` is raised when a plate exceeds it.
+    """
+    options = dict(
+        yaml_backend=yaml_backend or emitter.default_backend,
+        stable_ids=stable_ids,
+        snap_grid=snap_grid,
+        hoist=hoist,
+        fast_budget=fast_budget,
+        page_path=page_path,
+        consolidate_matrices=consolidate_matrices,
+        router=router,
+    )
+    _apply_options(options)
+
+    os.makedirs(output_dir, exist_ok=True)
+    cache = _load_cache(output_dir) if use_cache else {}
+
+    results = {}
+    tasks = []
+    for module_name in modules:
+        source = source_hash(module_name)
+        entry = cache.get(module_name)
+        if _is_fresh(entry, source, options, output_dir):
+            results[module_name] = entry
+            log(f"Skipping unchanged plate module '{module_name}'")
+        else:
+            results[module_name] = dict(source=source, options=options)
+            tasks.append((module_name, output_dir, entry, options))
+
+    def collect(module_name, plates):
+        results[module_name]["plates"] = plates
+        for plate in plates:
+            log(f"Generated plate '{plate['name']}' ({module_name})")
+
+    if jobs == 1 or len(tasks) <= 1:
+        for task in tasks:
+            collect(*_build_module(task))
+    else:
+        # a fresh worker per module, since plates register themselves as a
+        # side effect of being imported
+        with multiprocessing.Pool(jobs, maxtasksperchild=1) as pool:
+            for module_name, plates in pool.imap_unordered(_build_module, tasks):
+                collect(module_name, plates)
+
+    plates = [
+        plate for module_name in modules for plate in results[module_name]["plates"]
+    ]
+
+    if write_if_changed(
+        os.path.join(output_dir, "openhasp.yaml"),
+        "\n".join(plate["hass_yaml"] for plate in plates),
+    ):
+        log("Generated 'openhasp.yaml'")
+
+    if write_if_changed(
+        os.path.join(output_dir, "openhasp_automations.yaml"),
+        "\n".join(plate["hass_automations_yaml"] for plate in plates),
+    ):
+        log("Generated 'openhasp_automations.yaml'")
+
+    if use_cache:
+        with open(os.path.join(output_dir, CACHE_FILE), "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    for plate in plates:
+        for warning in plate.get("layout_warnings", []):
+            log(f"Layout: {warning}")
+
+    exceeded = []
+    for plate in plates:
+        report = plate.get("resources")
+        if report is None:
+            continue
+        log(f"Resources: {budget.summary(report)}")
+        if budgets is not None:
+            limits = budgets(plate["name"]) if callable(budgets) else budgets
+            exceeded.extend(limits.check(report))
+
+    violations = [v for plate in plates for v in plate.get("violations", [])]
+    for violation in violations:
+        log(f"Invalid value: {violation}")
+    if strict and violations:
+        raise validation.ValidationError(violations)
+
+    if exceeded:
+        raise budget.BudgetError(exceeded)
+
+    return [plate["name"] for plate in plates]
@@ -0,0 +1,539 @@
+import json
+from array import array
+from dataclasses import MISSING, fields
+from types import FunctionType, MappingProxyType, MemberDescriptorType
+
+from . import styling
+from .automation import HASSConfiguration
+
+GEOMETRY = ("x", "y", "w", "h")
+
+# sentinels for missing values in the typed id/page columns
+_NO_ID = 0
+_NO_PAGE = 255
+
+
+def _number(value):
+    return int(value) if value.is_integer() else value
+
+
+def _id(value):
+    return None if value == _NO_ID else value
+
+
+def _page(value):
+    return None if value == _NO_PAGE else value
+
+
+def _plan(kind):
+    """
+    The public fields of an object class, in output order, with their
+    defaults. Fields with a default factory default to None and are always
+    stored in the sparse maps.
+    """
+    plan = kind.__dict__.get("_columnar_plan")
+    if plan is None:
+        plan = []
+        for f in fields(kind):
+            if f.name.startswith("_"):
+                continue
+            default = f.default if f.default is not MISSING else None
+            plan.append((f.name, default, f.default_factory is not MISSING))
+        plan = tuple(plan)
+        kind._columnar_plan = plan
+    return plan
+
+
+def _defaults(kind):
+    defaults = kind.__dict__.get("_columnar_defaults")
+    if defaults is None:
+        defaults = {name: default for name, default, _ in _plan(kind)}
+        kind._columnar_defaults = defaults
+    return defaults
+
+
+class ColumnStore:
+    """
+    Compact storage for a plate's objects: geometry, ids and pages live in
+    typed arrays, every other property in a sparse map holding only values
+    that differ from the class default, and identical style dicts are
+    shared. Theme profiles are stored by name and resolved against the
+    plate's theme when a row is encoded. Rows are accessed through
+    `ObjectView`, which offers the same API as `Object`.
+
+    Encoded JSONL rows are cached until the row, its styles or profile, or
+    the plate's theme change; `encode` serializes the rows missing from the
+    cache in one pass over the columns.
+    """
+
+    def __init__(self, plate=None):
+        self.plate = plate
+        self.kinds = []
+        self.id = array("H")
+        self.page = array("B")
+        self.geometry = {name: array("d") for name in GEOMETRY}
+        self.sparse = {}
+        self.styles = []
+        self.profiles = {}
+        self.hass = {}
+        self.keys = {}
+        self.layouts = []
+        self.encoded = {}
+        self._theme = None
+        self._interned_styles = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def _intern_styles(self, styles):
+        if not styles:
+            return None
+        key = tuple(styles.items())
+        interned = self._interned_styles.get(key)
+        if interned is None:
+            interned = self._interned_styles[key] = MappingProxyType(dict(styles))
+        return interned
+
+    def add(
+        self,
+        kind,
+        styles=None,
+        hass=None,
+        profile=None,
+        key=None,
+        layout=None,
+        **values,
+    ):
+        """
+        Append a row of object class `kind` and return its view.
+        """
+        row = len(self.kinds)
+        self.kinds.append(kind)
+        self.layouts.append(layout)
+        if key is not None:
+            self.keys[row] = key
+        object_id = values.pop("id", None)
+        page = values.pop("page", None)
+        self.id.append(_NO_ID if object_id is None else object_id)
+        self.page.append(_NO_PAGE if page is None else page)
+
+        for name in GEOMETRY:
+            self.geometry[name].append(values.pop(name, 0) or 0)
+
+        plan = {name: (default, factory) for name, default, factory in _plan(kind)}
+        for name, value in values.items():
+            default, factory = plan[name]
+            if factory or value != default:
+                self.sparse.setdefault(name, {})[row] = value
+
+        self.styles.append(self._intern_styles(styles))
+        if profile:
+            self.profiles[row] = profile
+
+        view = ObjectView(self, row)
+        if hass is not None:
+            hass.target = view
+            self.hass[row] = hass
+        return view
+
+    def add_object(self, obj):
+        """
+        Copy an `Object` into the store and return the view replacing it.
+        """
+        values = {name: getattr(obj, name) for name, _, _ in _plan(type(obj))}
+        styles = {}
+        profile = None
+        if obj._styles is not None:
+            for style in obj._styles.styles:
+                styles.update(style.json)
+            profile = obj._styles.profile
+        return self.add(
+            type(obj),
+            styles=styles,
+            hass=obj._hass,
+            profile=profile,
+            key=obj._key,
+            layout=getattr(obj, "_layout", None),
+            **values,
+        )
+
+    def get(self, row, name):
+        if name in GEOMETRY:
+            return _number(self.geometry[name][row])
+        if name == "id":
+            return _id(self.id[row])
+        if name == "page":
+            return _page(self.page[row])
+
+        defaults = _defaults(self.kinds[row])
+        if name not in defaults:
+            raise AttributeError(name)
+        return self.sparse.get(name, {}).get(row, defaults[name])
+
+    def invalidate(self, row):
+        self.encoded.pop(row, None)
+        if row in self.hass:
+            self.hass[row].invalidate()
+
+    def set(self, row, name, value):
+        self.invalidate(row)
+        if name in GEOMETRY:
+            self.geometry[name][row] = value or 0
+        elif name == "id":
+            self.id[row] = _NO_ID if value is None else value
+        elif name == "page":
+            self.page[row] = _NO_PAGE if value is None else value
+        elif name in _defaults(self.kinds[row]):
+            self.sparse.setdefault(name, {})[row] = value
+        else:
+            raise AttributeError(name)
+
+    def profile_json(self, row):
+        profile = self.profiles.get(row)
+        theme = getattr(self.plate, "theme", None)
+        if not profile or theme is None:
+            return {}
+        return theme.json_for(profile)
+
+    def row_json(self, row):
+        kind = self.kinds[row]
+        sparse = self.sparse
+        j = {}
+        for name, default, _ in _plan(kind):
+            if name in GEOMETRY or name in ("id", "page"):
+                value = self.get(row, name)
+            else:
+                column = sparse.get(name)
+                value = column.get(row, default) if column else default
+            if value is not None:
+                j[name] = value
+
+        styles = self.styles[row]
+        if styles:
+            j.update(styles)
+        j.update(self.profile_json(row))
+        return kind._finish_json(ObjectView(self, row), j)
+
+    def _readers(self, kind):
+        """
+        For each field of `kind` that can be set on a row, in output order:
+        its name, the column holding it and the default for rows missing
+        from that column. Typed columns come with a function decoding their
+        stored values instead. Fields defaulting to None that no row sets
+        are left out.
+        """
+        readers = []
+        for name, default, _ in _plan(kind):
+            if name in GEOMETRY:
+                readers.append((name, self.geometry[name], _number))
+            elif name == "id":
+                readers.append((name, self.id, _id))
+            elif name == "page":
+                readers.append((name, self.page, _page))
+            elif default is not None or name in self.sparse:
+                readers.append((name, self.sparse.get(name, {}), default))
+        return readers
+
+    def _check_theme(self):
+        # profiles are resolved against the theme when encoding
+        theme = getattr(self.plate, "theme", None)
+        if theme is not self._theme:
+            for row in self.profiles:
+                self.encoded.pop(row, None)
+            self._theme = theme
+
+    def encode(self, rows=None):
+        """
+        Serialize the given rows (all rows by default) that are missing from
+        the `encoded` cache, in one pass over the columns.
+        """
+        self._check_theme()
+        rows = range(len(self.kinds)) if rows is None else rows
+        encoded = self.encoded
+        kinds = self.kinds
+        styles = self.styles
+        profiles = self.profiles
+        dumps = json.dumps
+        readers = {}
+        for row in rows:
+            if row in encoded:
+                continue
+            kind = kinds[row]
+            kind_readers = readers.get(kind)
+            if kind_readers is None:
+                kind_readers = readers[kind] = self._readers(kind)
+
+            j = {}
+            for name, column, default in kind_readers:
+                if type(column) is array:
+                    value = default(column[row])
+                else:
+                    value = column.get(row, default)
+                if value is not None:
+                    j[name] = value
+            if styles[row]:
+                j.update(styles[row])
+            if row in profiles:
+                j.update(self.profile_json(row))
+
+            j = kind._finish_json(ObjectView(self, row), j)
+            if isinstance(j, list):
+                encoded[row] = "\n".join(dumps(r) for r in j)
+            else:
+                encoded[row] = dumps(j)
+
+    def jsonl(self, row):
+        """
+        The encoded JSONL of `row`, see `encode`.
+        """
+        self._check_theme()
+        encoded = self.encoded.get(row)
+        if encoded is None:
+            self.encode((row,))
+            encoded = self.encoded[row]
+        return encoded
+
+    def iter_rows(self):
+        for row in range(len(self.kinds)):
+            j = self.row_json(row)
+            if isinstance(j, list):
+                yield from j
+            else:
+                yield j
+
+    def translate(self, dx=0, dy=0, rows=None):
+        """
+        Move the given rows (all top-level rows by default) in one pass.
+        Children are positioned relative to their parent and are left alone.
+        """
+        parents = self.sparse.get("parentid", {})
+        for name, delta in (("x", dx), ("y", dy)):
+            column = self.geometry[name]
+            for row in rows if rows is not None else range(len(column)):
+                if row not in parents:
+                    column[row] += delta
+                    self.encoded.pop(row, None)
+
+    def scale(self, sx, sy=None):
+        """
+        Scale every row's geometry in one pass over the columns.
+        """
+        sy = sx if sy is None else sy
+        self.encoded.clear()
+        for name, factor in (("x", sx), ("w", sx), ("y", sy), ("h", sy)):
+            self.geometry[name] = array(
+                "d", (v * factor for v in self.geometry[name])
+            )
+
+    def snap(self):
+        """
+        Round every row's geometry to whole pixels. Edges are rounded rather
+        than sizes, so objects that touched before still touch.
+        """
+        self.encoded.clear()
+        for position, size in (("x", "w"), ("y", "h")):
+            starts = self.geometry[position]
+            sizes = self.geometry[size]
+            self.geometry[size] = array(
+                "d", (float(round(p + s) - round(p)) for p, s in zip(starts, sizes))
+            )
+            self.geometry[position] = array("d", (float(round(p)) for p in starts))
+
+
+class StylesView:
+    """
+    The `ObjectStyles` API for a row of a `ColumnStore`. Styles set on the
+    row are stored merged; changing them copies the shared dict for that
+    row. The profile is kept by name, so it follows changes of the theme.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def _merge(self, styles):
+        merged = dict(self._store.styles[self._row] or {})
+        merged.update(styles)
+        self._store.styles[self._row] = self._store._intern_styles(merged)
+        self._store.invalidate(self._row)
+        return ObjectView(self._store, self._row)
+
+    def set(self, part=None, state=None, **styles):
+        if not styles:
+            return ObjectView(self._store, self._row)
+        s = styling.ObjectStyle(**styles)
+        s.part = part
+        s.state = state
+        return self._merge(s.json)
+
+    @property
+    def profile(self):
+        return self._store.profiles.get(self._row)
+
+    def use_profile(self, profile="defaults"):
+        self._store.profiles[self._row] = profile
+        self._store.invalidate(self._row)
+        return ObjectView(self._store, self._row)
+
+    def finalize_styles(self):
+        return self._store.profile_json(self._row)
+
+    @property
+    def json(self):
+        j = dict(self._store.styles[self._row] or {})
+        j.update(self.finalize_styles())
+        return j
+
+
+class ObjectView:
+    """
+    A lightweight handle on one row of a `ColumnStore`, exposing the same
+    attributes and export properties as the `Object` it replaced. Methods of
+    the object class, such as `ButtonMatrix.add_row`, are called on the view
+    itself, and the view passes `isinstance` checks against that class. The
+    class' dataclass fields, including the private ones, are exposed too, so
+    `dataclasses.fields`, `asdict` and the class' repr work on views.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_row", row)
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name in ObjectView.__slots__:
+            raise AttributeError(name)
+        if name in _defaults(self.kind):
+            return self._store.get(self._row, name)
+
+        # methods and properties of the object class are bound to the view;
+        # its private slots are not stored
+        attribute = getattr(self.kind, name)
+        if isinstance(attribute, MemberDescriptorType):
+            raise AttributeError(name)
+        if isinstance(attribute, property):
+            return attribute.fget(self)
+        if isinstance(attribute, FunctionType):
+            return attribute.__get__(self)
+        return attribute
+
+    def __setattr__(self, name, value):
+        # the view's own properties and slots, such as `plate`, have setters
+        if hasattr(type(self).__dict__.get(name), "__set__"):
+            object.__setattr__(self, name, value)
+        else:
+            self._store.set(self._row, name, value)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ObjectView)
+            and other._store is self._store
+            and other._row == self._row
+        )
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+    def __repr__(self):
+        return self.kind.__repr__(self)
+
+    @property
+    def kind(self):
+        return self._store.kinds[self._row]
+
+    @property
+    def __class__(self):
+        return self.kind
+
+    @property
+    def __dataclass_fields__(self):
+        return self.kind.__dataclass_fields__
+
+    def _invalidate(self):
+        """
+        Drop the row's cached JSONL and HASS configuration after a change.
+        Call this after mutating a field in place, e.g. appending to
+        `options`.
+        """
+        self._store.invalidate(self._row)
+
+    @property
+    def plate(self):
+        return self._store.plate
+
+    @plate.setter
+    def plate(self, plate):
+        # rows cannot move between stores
+        if plate is not self._store.plate:
+            raise ValueError(
+                f"{self.kind.__name__} is stored in plate "
+                f"{self._store.plate.name!r} and cannot be added to another plate"
+            )
+
+    _plate = plate
+
+    @property
+    def _layout(self):
+        return self._store.layouts[self._row]
+
+    @_layout.setter
+    def _layout(self, layout):
+        self._store.layouts[self._row] = layout
+
+    @property
+    def _key(self):
+        return self._store.keys.get(self._row)
+
+    @_key.setter
+    def _key(self, key):
+        self._store.keys[self._row] = key
+
+    @property
+    def _hass(self):
+        return self._store.hass.get(self._row)
+
+    @_hass.setter
+    def _hass(self, hass):
+        self._store.invalidate(self._row)
+        if hass is None:
+            self._store.hass.pop(self._row, None)
+        else:
+            hass.target = self
+            self._store.hass[self._row] = hass
+
+    @property
+    def _styles(self):
+        store, row = self._store, self._row
+        if store.styles[row] or row in store.profiles:
+            return StylesView(store, row)
+        return None
+
+    @property
+    def _jsonl(self):
+        return self._store.encoded.get(self._row)
+
+    @property
+    def styles(self):
+        return StylesView(self._store, self._row)
+
+    @property
+    def hass(self):
+        hass = self._store.hass.get(self._row)
+        if hass is None:
+            hass = self._store.hass[self._row] = HASSConfiguration(target=self)
+        return hass
+
+    @property
+    def has_automations(self):
+        return self._row in self._store.hass
+
+    @property
+    def json(self):
+        return self._store.row_json(self._row)
+
+    @property
+    def jsonl(self):
+        return self._store.jsonl(self._row)
@@ -0,0 +1,286 @@
+import argparse
+import copy
+import importlib
+import math
+from dataclasses import dataclass, field
+
+from . import spatial, styling
+
+# relative cost of drawing one pixel of each kind of operation, where an
+# opaque fill costs 1
+WEIGHTS = dict(
+    fill=1.0,
+    blend=2.0,
+    border=1.0,
+    radius=3.0,
+    shadow=2.0,
+)
+
+# the size of the object the profiles of a theme are measured on
+REFERENCE_SIZE = (100, 100)
+
+# the default budget of `fast_theme`, in multiples of an opaque fill
+FAST_BUDGET = 2.0
+
+
+def _main_styles(row):
+    # suffixed keys style other parts and states, which are not drawn when
+    # the page is shown
+    return {k: v for k, v in row.items() if styling.style_property(k) == k}
+
+
+def style_cost(styles, w, h, obj="obj"):
+    """
+    Estimate the cost of drawing a `w` x `h` object of type `obj` with the
+    given main part styles, returning it per kind of drawing operation.
+    Only styles set by the plate are known; defaults of the firmware's theme
+    are not taken into account.
+    """
+    w, h = max(w or 0, 0), max(h or 0, 0)
+    area = w * h
+    costs = {}
+
+    bg_opa = styles.get("bg_opa", 0 if obj in spatial.TRANSPARENT else 255)
+    if bg_opa:
+        costs["fill"] = area * WEIGHTS["fill" if bg_opa >= 255 else "blend"]
+
+    border_width = styles.get("border_width") or 0
+    border_opa = styles.get("border_opa", 255)
+    if border_width and border_opa:
+        weight = WEIGHTS["border"] * (1 if border_opa >= 255 else WEIGHTS["blend"])
+        costs["border"] = 2 * (w + h) * border_width * weight
+
+    radius = min(styles.get("radius") or 0, min(w, h) / 2)
+    if radius and (bg_opa or border_width):
+        # each corner is masked and anti-aliased
+        costs["radius"] = 4 * radius * radius * WEIGHTS["radius"]
+
+    shadow_width = styles.get("shadow_width") or 0
+    if shadow_width and styles.get("shadow_opa", 255):
+        # the blur gets more expensive as the shadow widens
+        spread = (w + 2 * shadow_width) * (h + 2 * shadow_width)
+        costs["shadow"] = spread * (1 + shadow_width / 8) * WEIGHTS["shadow"]
+
+    return costs
+
+
+@dataclass(slots=True)
+class ObjectCost:
+    entry: spatial.Entry
+    costs: dict = field(default_factory=dict)
+
+    @property
+    def total(self):
+        return sum(self.costs.values())
+
+    @property
+    def most_expensive(self):
+        return max(self.costs, key=self.costs.get) if self.costs else None
+
+    def __str__(self):
+        return f"{self.entry} {self.total:,.0f} ({self.most_expensive})"
+
+
+@dataclass(slots=True)
+class PageCost:
+    """
+    The estimated cost of drawing a page when it is shown, including page 0
+    which is drawn over it.
+    """
+
+    plate: str
+    page: int
+    w: int
+    h: int
+    objects: list = field(default_factory=list)
+
+    @property
+    def total(self):
+        return sum(o.total for o in self.objects)
+
+    @property
+    def screens(self):
+        """
+        The cost in multiples of filling the screen once.
+        """
+        return self.total / (self.w * self.h * WEIGHTS["fill"])
+
+    @property
+    def overdraw(self):
+        """
+        How many times each pixel of the screen is filled on average.
+        """
+        area = 0
+        for o in self.objects:
+            x1, y1, x2, y2 = o.entry.visible
+            if "fill" in o.costs:
+                area += max(x2 - x1, 0) * max(y2 - y1, 0)
+        return area / (self.w * self.h)
+
+    def hotspots(self, share=0.1):
+        """
+        The objects accounting for at least `share` of the page's cost, most
+        expensive first.
+        """
+        total = self.total
+        return sorted(
+            (o for o in self.objects if total and o.total >= share * total),
+            key=lambda o: o.total,
+            reverse=True,
+        )
+
+    def __str__(self):
+        hotspots = ", ".join(str(o) for o in self.hotspots())
+        return (
+            f"{self.plate} page {self.page}: {self.screens:.1f} screens, "
+            f"overdraw {self.overdraw:.1f}"
+            + (f"; hotspots: {hotspots}" if hotspots else "")
+        )
+
+
+def analyze(plate, indexes=None):
+    """
+    Estimate the draw cost of every page of `plate` from its objects'
+    resolved styles and their visible areas, returning a `PageCost` per page.
+    Hidden objects and objects clipped away entirely cost nothing.
+    """
+    indexes = indexes or spatial.index(plate)
+    pages = []
+    for number, page_index in indexes.items():
+        page = PageCost(plate.name, number, plate.w, plate.h)
+        for entry in page_index.entries:
+            x1, y1, x2, y2 = entry.visible
+            if x1 >= x2 or y1 >= y2:
+                continue
+            costs = style_cost(
+                _main_styles(entry.row),
+                x2 - x1,
+                y2 - y1,
+                entry.obj,
+            )
+            if costs:
+                page.objects.append(ObjectCost(entry, costs))
+        pages.append(page)
+    return pages
+
+
+def report(plate, indexes=None):
+    return [str(page) for page in analyze(plate, indexes)]
+
+
+def _opaque(opa):
+    # partial opacity is blended; make it fully opaque or transparent
+    return 255 if opa >= 128 else 0
+
+
+def _downgrade(styles, kind, allowance):
+    """
+    Make the `kind` of drawing operation cheaper in `styles`, a dict of
+    unsuffixed style properties, given the cost it may still use.
+    """
+    if kind == "shadow":
+        for name in [n for n in styles if n.startswith("shadow_")]:
+            del styles[name]
+        styles["shadow_width"] = 0
+    elif kind == "radius":
+        radius = math.sqrt(max(allowance, 0) / (4 * WEIGHTS["radius"]))
+        styles["radius"] = min(styles["radius"], int(radius))
+    elif kind == "border":
+        styles["border_width"] = min(styles["border_width"], 1)
+        if "border_opa" in styles:
+            styles["border_opa"] = _opaque(styles["border_opa"])
+    elif kind == "fill" and "bg_opa" in styles:
+        styles["bg_opa"] = _opaque(styles["bg_opa"])
+
+
+def _follow(styles, main, kind):
+    """
+    Apply a downgrade of the main part to the styles of another part or
+    state, touching only the properties it sets.
+    """
+    if kind == "shadow":
+        for name in [n for n in styles if n.startswith("shadow_")]:
+            del styles[name]
+    elif kind == "radius" and "radius" in styles:
+        styles["radius"] = min(styles["radius"], main["radius"])
+    elif kind == "border":
+        if "border_width" in styles:
+            styles["border_width"] = min(styles["border_width"], 1)
+        if "border_opa" in styles:
+            styles["border_opa"] = _opaque(styles["border_opa"])
+    elif kind == "fill" and "bg_opa" in styles:
+        styles["bg_opa"] = _opaque(styles["bg_opa"])
+
+
+def fast_styles(styles, budget=FAST_BUDGET, size=REFERENCE_SIZE):
+    """
+    Downgrade the most expensive operations of a profile's main part
+    `styles` until drawing an object of `size` with them costs at most
+    `budget` times an opaque fill. Returns the downgraded styles and the
+    kinds of operations that were downgraded.
+    """
+    w, h = size
+    limit = budget * w * h * WEIGHTS["fill"]
+    styles = dict(styles)
+    downgraded = []
+    while True:
+        costs = style_cost(styles, w, h)
+        total = sum(costs.values())
+        candidates = [k for k in costs if k not in downgraded]
+        if total <= limit or not candidates:
+            return styles, downgraded
+
+        kind = max(candidates, key=costs.get)
+        _downgrade(styles, kind, limit - (total - costs[kind]))
+        downgraded.append(kind)
+
+
+def fast_theme(theme, budget=FAST_BUDGET, size=REFERENCE_SIZE):
+    """
+    Return a copy of `theme` whose profiles are downgraded with
+    `fast_styles`. The downgrades chosen for the main part of a profile
+    apply to its other parts and states as well.
+    """
+    fast = copy.copy(theme)
+    fast.styles = copy.deepcopy(theme.styles)
+    fast.clear_cache()
+
+    for profile, targets in fast.styles.items():
+        main = targets.get(styling.ObjectStylePart.MAIN, {})
+        styles, downgraded = fast_styles(main, budget, size)
+        for target, target_styles in targets.items():
+            if target_styles is main:
+                target_styles.clear()
+                target_styles.update(styles)
+                continue
+            for kind in downgraded:
+                _follow(target_styles, styles, kind)
+    return fast
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate the draw cost of the pages of plate modules."
+    )
+    parser.add_argument("modules", nargs="+", help="plate modules to import")
+    parser.add_argument(
+        "--fast",
+        type=float,
+        metavar="BUDGET",
+        help="estimate with the fast variant of each plate's theme",
+    )
+    args = parser.parse_args()
+
+    import openhasp
+
+    for module_name in args.modules:
+        importlib.import_module(module_name)
+    for plate in openhasp.plates.plates.values():
+        if args.fast is not None and plate.theme is not None:
+            plate.set_theme(plate.theme.fast(args.fast))
+        for line in report(plate):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
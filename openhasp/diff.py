@@ -0,0 +1,134 @@
+import argparse
+import json
+
+# changing any of these requires the object to be deleted and created again
+RECREATE_PROPERTIES = ("obj", "parentid")
+
+
+def index_rows(rows):
+    """
+    Merge JSONL rows into one dict per object, keyed by `(page, id)`. Rows
+    without a `page` inherit the page of the previous row, like they do on
+    the device. Comments and other rows without an `id` are skipped.
+    """
+    objects = {}
+    page = None
+    for row in rows:
+        page = row.get("page", page)
+        if "id" not in row:
+            continue
+
+        key = (page, row["id"])
+        merged = objects.setdefault(key, {})
+        merged.update(row)
+        merged["page"] = page
+    return objects
+
+
+def load_snapshot(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class PlateDiff:
+    def __init__(self, creates=None, updates=None, deletes=None):
+        self.creates = creates or []
+        self.updates = updates or []
+        self.deletes = deletes or []
+
+    def __bool__(self):
+        return bool(self.creates or self.updates or self.deletes)
+
+    @property
+    def jsonl(self):
+        return "\n".join(json.dumps(row) for row in self.creates + self.updates)
+
+    @property
+    def commands(self):
+        """
+        The diff as openHASP commands: deletes first, then one `jsonl`
+        command per created or updated object.
+        """
+        commands = [f"p{page}b{id}.delete" for page, id in self.deletes]
+        commands.extend(
+            f"jsonl {json.dumps(row)}" for row in self.creates + self.updates
+        )
+        return commands
+
+
+def diff(deployed, generated):
+    """
+    Compare the rows of the last deployed plate with newly generated rows
+    (for instance `plate.iter_rows()`) and return a `PlateDiff` containing
+    only the property updates, creates and deletes needed on the device.
+
+    Objects whose type or parent changed, or which lost a property that can
+    not be unset, are deleted and created again.
+    """
+    old = index_rows(deployed)
+    new = index_rows(generated)
+
+    removed = {key for key in old if key not in new}
+    recreated = set()
+    for key, row in new.items():
+        previous = old.get(key)
+        if previous is None:
+            continue
+
+        if any(previous.get(p) != row.get(p) for p in RECREATE_PROPERTIES) or (
+            previous.keys() - row.keys()
+        ):
+            recreated.add(key)
+
+    # deleting an object on the device deletes its children as well
+    def parent_key(key, row):
+        parentid = row.get("parentid")
+        return (key[0], parentid) if parentid is not None else None
+
+    changed = True
+    while changed:
+        changed = False
+        for key, row in new.items():
+            if key in old and key not in recreated:
+                parent = parent_key(key, old[key])
+                if parent in recreated or parent in removed:
+                    recreated.add(key)
+                    changed = True
+
+    result = PlateDiff()
+    for key, row in new.items():
+        previous = old.get(key)
+        if previous is None or key in recreated:
+            result.creates.append(row)
+            continue
+
+        changes = {k: v for k, v in row.items() if previous.get(k) != v}
+        if changes:
+            update = {"page": key[0], "id": key[1]}
+            update.update(changes)
+            result.updates.append(update)
+
+    deleted = removed | recreated
+    for key, row in old.items():
+        if key in deleted and parent_key(key, row) not in deleted:
+            result.deletes.append(key)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print the openHASP commands that turn one plate into another."
+    )
+    parser.add_argument("deployed", help="JSONL of the plate currently deployed")
+    parser.add_argument("generated", help="newly generated plate JSONL")
+    args = parser.parse_args()
+
+    for command in diff(
+        load_snapshot(args.deployed), load_snapshot(args.generated)
+    ).commands:
+        print(command)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import json
+import math
+import re
+
+import yaml
+
+try:
+    from yaml import CDumper as Dumper
+except ImportError:
+    from yaml import Dumper
+
+BACKENDS = ("libyaml", "python", "direct")
+
+# used when `dump` is called without an explicit backend
+default_backend = "libyaml" if Dumper is not yaml.Dumper else "python"
+
+_PLAIN = re.compile(r"^[A-Za-z_][A-Za-z0-9_ .()/-]*$")
+_RESERVED = {
+    "y",
+    "n",
+    "yes",
+    "no",
+    "true",
+    "false",
+    "on",
+    "off",
+    "null",
+}
+
+
+def _float(value):
+    # YAML 1.1 floats, as PyYAML writes and reads them: a mantissa without
+    # a dot, as in 1e-05, would be read back as a string
+    if value != value:
+        return ".nan"
+    if value in (math.inf, -math.inf):
+        return ".inf" if value > 0 else "-.inf"
+    text = repr(value).lower()
+    if "." not in text and "e" in text:
+        text = text.replace("e", ".0e", 1)
+    return text
+
+
+def _scalar(value):
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, float):
+        return _float(value)
+    if isinstance(value, int):
+        return repr(value)
+    if isinstance(value, dict):
+        return "{}"
+    if isinstance(value, (list, tuple)):
+        return "[]"
+
+    value = str(value)
+    if _PLAIN.match(value) and not value.endswith(" ") and (
+        value.lower() not in _RESERVED
+    ):
+        return value
+    # a JSON string is a valid YAML double-quoted scalar
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _is_block(value):
+    return isinstance(value, (dict, list, tuple)) and len(value) > 0
+
+
+def _block(value, indent):
+    pad = " " * indent
+    if isinstance(value, dict):
+        for key in sorted(value):
+            item = value[key]
+            if _is_block(item):
+                yield f"{pad}{_scalar(key)}:"
+                child_indent = indent + 2 if isinstance(item, dict) else indent
+                yield from _block(item, child_indent)
+            else:
+                yield f"{pad}{_scalar(key)}: {_scalar(item)}"
+    else:
+        for item in value:
+            if _is_block(item):
+                lines = _block(item, indent + 2)
+                yield f"{pad}- {next(lines)[indent + 2:]}"
+                yield from lines
+            else:
+                yield f"{pad}- {_scalar(item)}"
+
+
+def emit(data):
+    """
+    Emit YAML for the plain dict/list/scalar structures produced by
+    `HASSConfiguration` and the automation classes, without going through
+    PyYAML's representer and emitter. Keys are sorted like `yaml.dump`, but
+    quoting differs, so the output is equivalent rather than identical.
+    """
+    if not _is_block(data):
+        return _scalar(data) + "\n"
+    return "\n".join(_block(data, 0)) + "\n"
+
+
+def dump(data, backend=None):
+    """
+    Dump `data` to YAML using `backend`: "libyaml" (PyYAML's C emitter, when
+    available), "python" (PyYAML's pure-Python emitter) or "direct" (`emit`).
+    """
+    backend = backend or default_backend
+    if backend == "direct":
+        return emit(data)
+    if backend == "python":
+        return yaml.dump(data, Dumper=yaml.Dumper)
+    if backend == "libyaml":
+        return yaml.dump(data, Dumper=Dumper)
+    raise ValueError(
+        f"unknown YAML backend {backend!r}, expected one of {', '.join(BACKENDS)}"
+    )
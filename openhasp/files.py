@@ -0,0 +1,17 @@
+import os
+
+
+def write_if_changed(path, content):
+    """
+    Write `content` to `path` unless the file already holds it, leaving
+    unchanged files (and their mtimes) untouched. Returns whether the file
+    was written.
+    """
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == content:
+                return False
+
+    with open(path, "w") as f:
+        f.write(content)
+    return True
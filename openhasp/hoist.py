@@ -0,0 +1,211 @@
+import json
+
+from . import _rows, spatial
+from .references import automation_attributes, collect, remap
+
+
+def _object_keys(page):
+    """
+    Key the objects of a page by their content without `page` and `id`,
+    their Home Assistant bindings and the key of their parent. Returns the
+    objects and their keys, both by object ID.
+    """
+    objects = {}
+    for child in page.children:
+        if "obj" in _rows(child)[0] and child.id is not None:
+            objects.setdefault(child.id, child)
+
+    keys = {}
+
+    def key(object_id):
+        if object_id not in keys:
+            child = objects[object_id]
+            rows = [
+                {k: v for k, v in row.items() if k not in ("page", "id", "parentid")}
+                for row in _rows(child)
+            ]
+            hass = None
+            if child.has_automations:
+                hass = {k: v for k, v in child.hass.yaml.items() if k != "obj"}
+            parent = key(child.parentid) if child.parentid in objects else None
+            keys[object_id] = json.dumps([rows, hass, parent], sort_keys=True)
+        return keys[object_id]
+
+    for object_id in objects:
+        key(object_id)
+    return objects, keys
+
+
+def _remapped_yaml(automation, references):
+    """
+    The YAML `automation` would produce with its references rewritten.
+    """
+    original = automation_attributes(automation)
+    try:
+        for name, value in original.items():
+            setattr(automation, name, remap(value, references))
+        return json.dumps(automation.yaml, sort_keys=True)
+    finally:
+        for name, value in original.items():
+            setattr(automation, name, value)
+
+
+class _Pages:
+    """
+    The content pages of a plate, with their objects keyed for comparison
+    and a spatial index to check stacking.
+    """
+
+    def __init__(self, plate):
+        self.numbers = list(range(1, len(plate.pages)))
+        self.objects = {}
+        self.keys = {}
+        self.by_key = {}
+        for number in self.numbers:
+            objects, keys = _object_keys(plate.pages[number])
+            self.objects[number] = objects
+            self.keys[number] = keys
+            self.by_key[number] = {key: objects[i] for i, key in keys.items()}
+        self.indexes = spatial.index(plate)
+
+    def candidates(self):
+        # keys found exactly once on every content page
+        counts = {}
+        for number in self.numbers:
+            for key in self.keys[number].values():
+                counts.setdefault(key, []).append(number)
+        return {key for key, pages in counts.items() if pages == self.numbers}
+
+    def movable(self, key, candidates):
+        """
+        Whether the object can move to page 0 along with the other
+        candidates: its parent and children move too, and no object staying
+        behind, nor on page 0, is drawn over it.
+        """
+        for number in self.numbers:
+            obj = self.by_key[number][key]
+            keys = self.keys[number]
+
+            if obj.parentid in keys and keys[obj.parentid] not in candidates:
+                return False
+            for child in self.objects[number].values():
+                if child.parentid == obj.id and keys[child.id] not in candidates:
+                    return False
+
+            page_index = self.indexes[number]
+            entry = next(
+                (e for e in page_index.entries if e.page == number and e.id == obj.id),
+                None,
+            )
+            if entry is None:
+                continue
+            for other in page_index.query(entry.rect):
+                if other.order <= entry.order:
+                    continue
+                if other.page == 0 or keys.get(other.id) not in candidates:
+                    return False
+        return True
+
+
+def hoist(plate):
+    """
+    Move objects that every content page creates identically onto page 0,
+    which openHASP shows on all pages, so the device holds a single copy.
+
+    An object is only hoisted together with its parent and children, when
+    nothing drawn after it overlaps it, and when the automations referring
+    to it are the same on every page once their references are rewritten.
+    References in automations are then rewritten and automations that have
+    become identical are kept once. Returns the hoisted objects.
+    """
+    from . import Comment
+
+    if len(plate.pages) < 3:
+        return []
+
+    pages = _Pages(plate)
+    candidates = pages.candidates()
+    automations = [
+        (a, collect(automation_attributes(a), set())) for a in plate.automations
+    ]
+
+    while candidates:
+        movable = {key for key in candidates if pages.movable(key, candidates)}
+        if movable != candidates:
+            candidates = movable
+            continue
+
+        placeholders = {key: (0, -1 - i) for i, key in enumerate(candidates)}
+        references = {
+            (number, pages.by_key[number][key].id): placeholder
+            for key, placeholder in placeholders.items()
+            for number in pages.numbers
+        }
+
+        # automations referring to each copy have to agree once remapped
+        agreeing = set()
+        for key in candidates:
+            seen = None
+            for number in pages.numbers:
+                instance = (number, pages.by_key[number][key].id)
+                yaml = sorted(
+                    _remapped_yaml(a, references)
+                    for a, found in automations
+                    if instance in found
+                )
+                if seen is None:
+                    seen = yaml
+                elif yaml != seen:
+                    break
+            else:
+                agreeing.add(key)
+
+        if agreeing == candidates:
+            break
+        candidates = agreeing
+
+    if not candidates:
+        return []
+
+    first = pages.numbers[0]
+    page_zero = plate.pages[0]
+    survivors = [
+        child
+        for child in pages.objects[first].values()
+        if pages.keys[first][child.id] in candidates
+    ]
+
+    references = {}
+    for obj in survivors:
+        key = pages.keys[first][obj.id]
+        old_ids = [(n, pages.by_key[n][key].id) for n in pages.numbers]
+        obj.page = 0
+        obj.id = plate.id(obj)
+        for reference in old_ids:
+            references[reference] = (0, obj.id)
+    for obj in survivors:
+        if obj.parentid is not None and (first, obj.parentid) in references:
+            obj.parentid = references[(first, obj.parentid)][1]
+
+    removed = {
+        id(pages.by_key[number][key])
+        for number in pages.numbers
+        for key in candidates
+    }
+    for number in pages.numbers:
+        layout = plate.pages[number].layout
+        layout.children = [c for c in layout.children if id(c) not in removed]
+
+    if not page_zero._page_added:
+        page_zero.layout.children.append(Comment(comment=page_zero.title, page=0))
+        page_zero._page_added = True
+    page_zero.layout.children.extend(survivors)
+
+    unique = {}
+    for automation in plate.automations:
+        for name, value in automation_attributes(automation).items():
+            setattr(automation, name, remap(value, references))
+        unique.setdefault(json.dumps(automation.yaml, sort_keys=True), automation)
+    plate.automations = list(unique.values())
+
+    return survivors
@@ -0,0 +1,133 @@
+import heapq
+import json
+import os
+import sys
+
+from . import types
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# fields telling objects of a class apart, in order of preference
+CONTENT_FIELDS = ("text", "options", "src")
+
+
+def construction_site():
+    """
+    Describe where an object is being added: the chain of calls outside of
+    openhasp, up to the plate module, as module and function names.
+    """
+    frame = sys._getframe(1)
+    parts = []
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not os.path.abspath(filename).startswith(_PACKAGE_DIR):
+            module = frame.f_globals.get("__name__", filename)
+            parts.append(f"{module}:{frame.f_code.co_name}")
+            if frame.f_code.co_name == "<module>":
+                break
+        frame = frame.f_back
+    return " < ".join(parts)
+
+
+def object_key(obj, parent=None):
+    """
+    Derive a key for `obj` from its content: its parent's key (or, for top
+    level objects, the `construction_site`), its class and the first of its
+    `CONTENT_FIELDS` that is set. Adding, removing or moving other objects
+    leaves the key alone; editing the content changes it.
+
+    Objects without content, or with the same content, share a key and are
+    told apart by `IdMap` in the order they are added, so adding one of
+    them before the others shifts the IDs of those after it. Pass an
+    explicit `key` to `Plate.add` for those.
+    """
+    scope = parent if parent is not None else construction_site()
+    key = f"{scope} > {type(obj).__name__}"
+    for name in CONTENT_FIELDS:
+        content = getattr(obj, name, None)
+        if content:
+            return f"{key} {json.dumps(content, ensure_ascii=False)}"
+    return key
+
+
+class IdMap:
+    """
+    Keeps object IDs stable across builds by mapping object keys to the IDs
+    they were given before, per page. New keys get the lowest free ID on
+    their page; IDs of keys that disappear are released when the map is
+    saved, so IDs stay within `types.object_id`.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.pages = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.pages = json.load(f)
+
+        self._assigned = {}
+        self._used = {}
+        self._free = {}
+        self._occurrences = {}
+        self._keys = {}
+
+    def _free_ids(self, page):
+        free = self._free.get(page)
+        if free is None:
+            reserved = set(self.pages.get(page, {}).values())
+            free = [
+                i
+                for i in range(types.object_id.min, types.object_id.max + 1)
+                if i not in reserved
+            ]
+            heapq.heapify(free)
+            self._free[page] = free
+        return free
+
+    def assign(self, page, key):
+        page = str(page)
+        assigned = self._assigned.setdefault(page, {})
+        used = self._used.setdefault(page, set())
+
+        # objects sharing a key are told apart by the order they are added in
+        count = self._occurrences.get((page, key), 0) + 1
+        self._occurrences[(page, key)] = count
+        if count > 1:
+            key = f"{key} #{count}"
+
+        object_id = self.pages.get(page, {}).get(key)
+        if object_id is None or object_id in used:
+            object_id = self._next_free(page, used)
+        assigned[key] = object_id
+        used.add(object_id)
+        self._keys[(page, object_id)] = key
+        return object_id
+
+    def _next_free(self, page, used):
+        free = self._free_ids(page)
+        while free:
+            candidate = heapq.heappop(free)
+            if candidate not in used:
+                return candidate
+
+        raise ValueError(
+            f"page {page} has no free object ids in range "
+            f"[{types.object_id.min}, {types.object_id.max}]"
+        )
+
+    def key_of(self, page, object_id):
+        """
+        The key the object `object_id` on `page` was assigned under in this
+        build, including the ordinal telling it apart from others.
+        """
+        return self._keys.get((str(page), object_id))
+
+    def save(self, path=None):
+        """
+        Persist the IDs assigned during this build, dropping keys that were
+        not seen so their IDs become free again.
+        """
+        path = path or self.path
+        with open(path, "w") as f:
+            json.dump(self._assigned, f, indent=2, sort_keys=True)
@@ -0,0 +1,118 @@
+import collections
+import json
+
+
+def connect(host, port=1883, username=None, password=None, client_id=""):
+    """
+    Create and connect a paho-mqtt client, running its network loop in a
+    background thread. Requires the optional `paho-mqtt` package.
+    """
+    try:
+        import paho.mqtt.client as mqtt
+    except ImportError as e:
+        raise ImportError(
+            "publishing over MQTT requires the 'paho-mqtt' package"
+        ) from e
+
+    if hasattr(mqtt, "CallbackAPIVersion"):
+        # paho-mqtt 2.0 requires choosing the callback API; no callbacks are
+        # registered here, so the current one is used
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+    else:
+        client = mqtt.Client(client_id=client_id)
+    if username is not None:
+        client.username_pw_set(username, password)
+    client.connect(host, port)
+    client.loop_start()
+    return client
+
+
+def batch_lines(lines, max_size):
+    """
+    Pack JSONL lines into newline separated payloads of at most `max_size`
+    bytes. A single line that is larger than `max_size` is sent on its own.
+    """
+    batch = []
+    size = 0
+    for line in lines:
+        length = len(line.encode())
+        if batch and size + 1 + length > max_size:
+            yield "\n".join(batch)
+            batch = []
+            size = 0
+
+        size += length + (1 if batch else 0)
+        batch.append(line)
+
+    if batch:
+        yield "\n".join(batch)
+
+
+class Publisher:
+    """
+    Publish plates to openHASP devices over MQTT.
+
+    `client` is anything with a paho-style `publish(topic, payload, qos)`
+    method, such as the client returned by `connect` or an in-process fake.
+    Objects are packed into batched `jsonl` commands of at most
+    `max_batch_size` bytes, and at most `max_in_flight` messages are awaiting
+    acknowledgement at a time: the oldest is waited on before publishing more.
+    """
+
+    def __init__(
+        self, client, prefix="hasp", qos=1, max_batch_size=1024, max_in_flight=8
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.qos = qos
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max_in_flight
+        self._in_flight = collections.deque()
+
+    def _publish(self, topic, payload):
+        # make room first so no more than `max_in_flight` are ever pending
+        while self._in_flight and len(self._in_flight) >= self.max_in_flight:
+            self._in_flight.popleft().wait_for_publish()
+        info = self.client.publish(topic, payload, qos=self.qos)
+        if hasattr(info, "wait_for_publish"):
+            self._in_flight.append(info)
+
+    def flush(self):
+        while self._in_flight:
+            self._in_flight.popleft().wait_for_publish()
+
+    def command(self, node, command):
+        self._publish(f"{self.prefix}/{node}/command", command)
+
+    def publish_rows(self, node, rows):
+        """
+        Send `rows` to the `jsonl` command topic of `node`, returning the
+        number of messages published.
+        """
+        topic = f"{self.prefix}/{node}/command/jsonl"
+        count = 0
+        for payload in batch_lines(
+            (json.dumps(row) for row in rows), self.max_batch_size
+        ):
+            self._publish(topic, payload)
+            count += 1
+        self.flush()
+        return count
+
+    def publish_plate(self, plate, clear=True):
+        """
+        Replace the objects on the device named after `plate` with the
+        plate's objects.
+        """
+        if clear:
+            self.command(plate.name, "clearpage all")
+        rows = (row for row in plate.iter_rows() if "comment" not in row)
+        return self.publish_rows(plate.name, rows)
+
+    def publish_diff(self, node, diff):
+        """
+        Apply an `openhasp.diff.PlateDiff` to `node`.
+        """
+        for page, id in diff.deletes:
+            self.command(node, f"p{page}b{id}.delete")
+        return self.publish_rows(node, diff.creates + diff.updates)
@@ -0,0 +1,71 @@
+import json
+import re
+
+_REFERENCE = re.compile(r"\bp(\d+)b(\d+)\b")
+
+
+def _decode(value):
+    if not value.startswith("{"):
+        return None
+    try:
+        data = json.loads(value)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and "page" in data and "id" in data:
+        return data
+    return None
+
+
+def automation_attributes(automation):
+    """
+    The attributes of `automation` that may refer to objects, by name.
+    """
+    return {k: v for k, v in vars(automation).items() if k != "plate"}
+
+
+def remap(value, references):
+    """
+    Rewrite the object references in `value`: `pXbY` tokens in strings and
+    JSON encoded objects with a `page` and an `id`.
+    """
+    if isinstance(value, str):
+        data = _decode(value)
+        if data is not None:
+            reference = references.get((data["page"], data["id"]))
+            if reference is None:
+                return value
+            data["page"], data["id"] = reference
+            return json.dumps(data)
+
+        def replace(match):
+            reference = (int(match.group(1)), int(match.group(2)))
+            if reference not in references:
+                return match.group(0)
+            return "p{}b{}".format(*references[reference])
+
+        return _REFERENCE.sub(replace, value)
+    if isinstance(value, dict):
+        return {k: remap(v, references) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(remap(v, references) for v in value)
+    return value
+
+
+def collect(value, found):
+    """
+    Add the `(page, id)` of every object referenced in `value` to `found`.
+    """
+    if isinstance(value, str):
+        data = _decode(value)
+        if data is not None:
+            found.add((data["page"], data["id"]))
+        else:
+            for match in _REFERENCE.finditer(value):
+                found.add((int(match.group(1)), int(match.group(2))))
+    elif isinstance(value, dict):
+        for v in value.values():
+            collect(v, found)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            collect(v, found)
+    return found
@@ -0,0 +1,204 @@
+import copy
+import re
+
+from . import columnar, styling
+
+# object fields and style properties holding pixel sizes, besides geometry
+PIXEL_FIELDS = (
+    "pad_top",
+    "pad_bottom",
+    "pad_left",
+    "pad_right",
+    "pad_inner",
+    "margin_top",
+    "margin_bottom",
+    "margin_left",
+    "margin_right",
+    "value_ofs_y",
+    "radius",
+    "border_width",
+    "outline_width",
+    "outline_pad",
+    "shadow_width",
+    "shadow_ofs_x",
+    "shadow_ofs_y",
+    "shadow_spread",
+    "line_width",
+    "text_letter_space",
+    "text_line_space",
+)
+
+# object fields and style properties selecting a font
+FONT_FIELDS = ("text_font", "value_font")
+
+_FONT = re.compile(r"^(.*?)(\d+)$")
+
+
+def scale_font(font, factor, sizes=None):
+    """
+    Scale a font selection such as `16`, `"32"` or `"md_24"` by `factor`,
+    keeping its type and prefix. With `sizes`, the nearest available size is
+    used.
+    """
+    match = _FONT.match(str(font))
+    if not match:
+        return font
+
+    prefix, size = match.group(1), int(match.group(2))
+    size = round(size * factor)
+    if sizes:
+        size = min(sizes, key=lambda s: abs(s - size))
+
+    if isinstance(font, int):
+        return size
+    return f"{prefix}{size}"
+
+
+def scale_pixels(value, factor):
+    """
+    Scale a pixel size by `factor`, keeping nonzero sizes at least one pixel
+    in magnitude so thin borders and small offsets do not vanish.
+    """
+    scaled = round(value * factor)
+    if value and not scaled:
+        return 1 if value > 0 else -1
+    return scaled
+
+
+def _font_mapper(fonts, factor, sizes):
+    cache = {}
+
+    def map_font(font):
+        if font not in cache:
+            if callable(fonts):
+                cache[font] = fonts(font)
+            elif fonts is not None and font in fonts:
+                cache[font] = fonts[font]
+            else:
+                cache[font] = scale_font(font, factor, sizes)
+        return cache[font]
+
+    return map_font
+
+
+def retarget(plate, name, w, h, fonts=None, font_sizes=None):
+    """
+    Produce a copy of a built `plate` named `name` for a `w` x `h` screen,
+    without re-running the module that defined it.
+
+    Objects are copied into a `columnar.ColumnStore` and all geometry is
+    transformed in one pass over its columns. Pixel sized properties are
+    scaled with it, keeping nonzero sizes at least one pixel (see
+    `scale_pixels`), and fonts are scaled by the smaller of the two factors
+    unless `fonts` maps them explicitly (a dict or a callable). Each distinct
+    style dict is transformed once and shared between objects.
+
+    Automations are copied onto the new plate; plate names written by hand
+    into their actions are not rewritten.
+    """
+    from . import GridLayout, Object, Page, Plate
+
+    sx = w / plate.w
+    sy = h / plate.h
+    factor = min(sx, sy)
+    map_font = _font_mapper(fonts, factor, font_sizes)
+
+    target = Plate(name, w, h, theme=plate.theme, router=plate.router)
+    target.text_font = plate.text_font
+    target.text_color = plate.text_color
+    store = target.store = columnar.ColumnStore(target)
+
+    for page in plate.pages:
+        layout = copy.copy(page.layout)
+        if isinstance(layout, GridLayout):
+            layout.padding = (
+                round(layout.padding[0] * sx),
+                round(layout.padding[1] * sy),
+            )
+
+        new_page = Page(target, layout=layout, title=page.title)
+        new_page._page_added = page._page_added
+        new_page._number = len(target.pages)
+        target.pages.append(new_page)
+
+        views = {}
+        layout.children = []
+        for child in page.children:
+            if isinstance(child, (Object, columnar.ObjectView)):
+                view = views.get(id(child))
+                if view is None:
+                    view = views[id(child)] = _copy_into(store, child)
+                layout.children.append(view)
+            else:
+                layout.children.append(copy.copy(child))
+
+    store.scale(sx, sy)
+    store.snap()
+
+    for field_name in PIXEL_FIELDS:
+        column = store.sparse.get(field_name)
+        if column:
+            for row, value in column.items():
+                if value is not None:
+                    column[row] = scale_pixels(value, factor)
+
+    for field_name in FONT_FIELDS:
+        column = store.sparse.get(field_name)
+        if column:
+            for row, value in column.items():
+                if value is not None:
+                    column[row] = map_font(value)
+
+    styles = {}
+    for row, style in enumerate(store.styles):
+        if not style:
+            continue
+        key = id(style)
+        if key not in styles:
+            styles[key] = store._intern_styles(
+                _retarget_styles(style, factor, map_font)
+            )
+        store.styles[row] = styles[key]
+
+    # automations are copied deeply so the copies share no mutable state
+    # with the source plate, but refer to the new plate rather than a copy
+    memo = {id(plate): target}
+    for automation in plate.automations:
+        target.add_automation(copy.deepcopy(automation, memo))
+
+    return target
+
+
+def _copy_into(store, child):
+    if isinstance(child, columnar.ObjectView):
+        source = child._store
+        row = child._row
+        kind = source.kinds[row]
+        values = {n: source.get(row, n) for n, _, _ in columnar._plan(kind)}
+        # profiles are resolved here, so scaling applies to them as well
+        styles = child.styles.json
+        hass = source.hass.get(row)
+    else:
+        kind = type(child)
+        values = {n: getattr(child, n) for n, _, _ in columnar._plan(kind)}
+        styles = child.styles.json if child._styles is not None else None
+        hass = child._hass
+
+    if hass is not None:
+        hass = copy.copy(hass)
+        hass.properties = dict(hass.properties)
+        hass.events = dict(hass.events)
+        hass.invalidate()
+    return store.add(kind, styles=styles, hass=hass, **values)
+
+
+def _retarget_styles(style, factor, map_font):
+    result = {}
+    for key, value in style.items():
+        name = styling.style_property(key)
+        if name in FONT_FIELDS:
+            value = map_font(value)
+        elif name in PIXEL_FIELDS and isinstance(value, (int, float)):
+            value = scale_pixels(value, factor)
+        result[key] = value
+    return result
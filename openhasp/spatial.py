@@ -0,0 +1,308 @@
+from dataclasses import dataclass, field
+
+from .references import automation_attributes, collect
+
+# objects drawing no background unless given a `bg_opa`; tabs are drawn by
+# their tab view
+TRANSPARENT = ("label", "line", "tab")
+
+# draw order offset of page 0 objects
+OVERLAY = 1 << 31
+
+
+@dataclass(slots=True)
+class Entry:
+    """
+    An object's absolute rectangle on the screen, as `(x1, y1, x2, y2)` with
+    exclusive right and bottom edges. `visible` is the part of it left after
+    clipping by its ancestors, `order` its position in draw order and `end`
+    the position of its last descendant. `tab` is the tab it is shown on and
+    `row` the object's merged JSONL row.
+    """
+
+    page: int
+    id: int
+    obj: str
+    rect: tuple
+    visible: tuple
+    order: int = 0
+    end: int = 0
+    opaque: bool = True
+    parent: "Entry" = field(default=None, repr=False)
+    tab: "Entry" = field(default=None, repr=False)
+    child: object = field(default=None, repr=False)
+    row: dict = field(default=None, repr=False)
+
+    def is_ancestor_of(self, other):
+        # descendants are numbered right after their ancestor
+        return self.order < other.order <= self.end
+
+    def __str__(self):
+        return f"p{self.page}b{self.id} ({self.obj})"
+
+
+def _intersect(a, b):
+    return (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+
+
+def _empty(rect):
+    return rect[0] >= rect[2] or rect[1] >= rect[3]
+
+
+def _contains(outer, inner):
+    return (
+        outer[0] <= inner[0]
+        and outer[1] <= inner[1]
+        and outer[2] >= inner[2]
+        and outer[3] >= inner[3]
+    )
+
+
+def _exclusive(a, b):
+    # objects on different tabs are never shown together
+    return a.tab is not None and b.tab is not None and a.tab is not b.tab
+
+
+def _opaque(row):
+    default = 0 if row["obj"] in TRANSPARENT else 255
+    return not row.get("hidden") and row.get("bg_opa", default) > 0
+
+
+class SpatialIndex:
+    """
+    A uniform grid of `cell_size` pixel cells over a page, holding the
+    absolute rectangles of its objects (and of page 0, which is shown on top
+    of every page). Each query only compares objects sharing a cell, so it
+    stays fast for pages with thousands of objects.
+    """
+
+    def __init__(self, page, w, h, entries, cell_size=64):
+        self.page = page
+        self.w = w
+        self.h = h
+        self.cell_size = cell_size
+        self.entries = entries
+        self.cells = {}
+        for entry in entries:
+            for cell in self._cells(entry.rect):
+                self.cells.setdefault(cell, []).append(entry)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def _cells(self, rect):
+        if _empty(rect):
+            return
+        x1, y1 = self._cell(rect[0], rect[1])
+        x2, y2 = self._cell(rect[2] - 1, rect[3] - 1)
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                yield cx, cy
+
+    def query(self, rect):
+        """
+        Return the entries whose rectangle intersects `rect`, in draw order.
+        """
+        found = {}
+        for cell in self._cells(rect):
+            for entry in self.cells.get(cell, ()):
+                if not _empty(_intersect(entry.rect, rect)):
+                    found[id(entry)] = entry
+        return sorted(found.values(), key=lambda e: e.order)
+
+    def overlaps(self):
+        """
+        Return pairs of this page's objects whose rectangles intersect,
+        leaving out objects and their own descendants.
+        """
+        pairs = []
+        for cell, entries in self.cells.items():
+            for i, entry in enumerate(entries):
+                if entry.page != self.page:
+                    continue
+                for other in entries[i + 1 :]:
+                    if other.page != self.page:
+                        continue
+                    overlap = _intersect(entry.rect, other.rect)
+                    # report each pair once, from the cell holding the
+                    # corner of its intersection
+                    if _empty(overlap) or self._cell(*overlap[:2]) != cell:
+                        continue
+                    if entry.is_ancestor_of(other) or _exclusive(entry, other):
+                        continue
+                    pairs.append((entry, other))
+        return pairs
+
+    def out_of_bounds(self):
+        """
+        Return this page's objects that extend past the edges of the screen.
+        """
+        screen = (0, 0, self.w, self.h)
+        return [
+            e
+            for e in self.entries
+            if e.page == self.page and not _contains(screen, e.rect)
+        ]
+
+    def occluded(self):
+        """
+        Return `(entry, occluder)` pairs for this page's objects that are
+        entirely hidden: clipped away by their ancestors, or covered by a
+        single opaque object drawn after them. Coverage by several objects
+        together is not detected.
+        """
+        result = []
+        for entry in self.entries:
+            if entry.page != self.page:
+                continue
+            if _empty(entry.visible):
+                result.append((entry, entry.parent))
+                continue
+
+            # an occluder covers the visible corner, so shares its cell
+            cell = self._cell(entry.visible[0], entry.visible[1])
+            for other in self.cells.get(cell, ()):
+                if (
+                    other.order > entry.order
+                    and other.opaque
+                    and _contains(other.visible, entry.visible)
+                    and not entry.is_ancestor_of(other)
+                    and not _exclusive(entry, other)
+                ):
+                    result.append((entry, other))
+                    break
+        return result
+
+
+def _entries(plate, page, start=0):
+    """
+    Resolve the rectangles of a page's objects through their `parentid`,
+    numbering them in draw order: depth first, siblings in creation order.
+    """
+    screen = (0, 0, plate.w, plate.h)
+    nodes = {}
+    roots = []
+    seen = set()
+    for child in page.children:
+        if id(child) in seen:
+            continue
+        seen.add(id(child))
+
+        rows = child.json
+        for row in rows if isinstance(rows, list) else [rows]:
+            if "obj" not in row or row.get("id") is None:
+                continue
+            # later rows for the same id update the object
+            node = nodes.get(row["id"])
+            if node is None:
+                nodes[row["id"]] = (dict(row), child, [])
+            else:
+                node[0].update(row)
+
+    for object_id, (row, _, _) in nodes.items():
+        parent = nodes.get(row.get("parentid"))
+        if parent is not None:
+            parent[2].append(object_id)
+        else:
+            roots.append(object_id)
+
+    entries = []
+
+    def visit(object_id, parent):
+        row, child, children = nodes[object_id]
+        if row.get("hidden"):
+            return
+
+        area = parent.rect if parent is not None else screen
+        clip = parent.visible if parent is not None else screen
+        x = area[0] + (row.get("x") or 0)
+        y = area[1] + (row.get("y") or 0)
+        w = row.get("w", area[2] - area[0])
+        h = row.get("h", area[3] - area[1])
+        rect = (x, y, x + (w or 0), y + (h or 0))
+
+        entry = Entry(
+            page=row.get("page"),
+            id=object_id,
+            obj=row["obj"],
+            rect=rect,
+            visible=_intersect(rect, clip),
+            order=start + len(entries),
+            opaque=_opaque(row),
+            parent=parent,
+            child=child,
+            row=row,
+        )
+        if row["obj"] == "tab":
+            entry.tab = entry
+        elif parent is not None:
+            entry.tab = parent.tab
+        entries.append(entry)
+        for child_id in children:
+            visit(child_id, entry)
+        entry.end = start + len(entries) - 1
+
+    for object_id in roots:
+        visit(object_id, None)
+    return entries
+
+
+def index(plate, cell_size=64):
+    """
+    Build a `SpatialIndex` for every page of `plate`, keyed by page number.
+    """
+    if not plate.pages:
+        return {}
+
+    # page 0 is drawn on top of the other pages
+    shared = _entries(plate, plate.pages[0], start=OVERLAY)
+    indexes = {}
+    for number, page in enumerate(plate.pages):
+        entries = shared if number == 0 else _entries(plate, page) + shared
+        indexes[number] = SpatialIndex(number, plate.w, plate.h, entries, cell_size)
+    return indexes
+
+
+def report(plate, indexes=None):
+    """
+    Describe the objects of `plate` that run off the screen or are hidden,
+    one line each.
+    """
+    indexes = indexes or index(plate)
+    lines = []
+    for number, page_index in indexes.items():
+        for entry in page_index.out_of_bounds():
+            lines.append(f"{plate.name} {entry} is off-screen at {entry.rect}")
+        for entry, occluder in page_index.occluded():
+            lines.append(f"{plate.name} {entry} is hidden by {occluder}")
+    return lines
+
+
+def drop_occluded(plate, indexes=None):
+    """
+    Remove the objects of `plate` that can never be seen, returning their
+    entries. Descendants of a removed object are hidden as well, so they
+    are removed with it, and so are the automations only referring to
+    removed objects.
+    """
+    indexes = indexes or index(plate)
+    dropped = []
+    for number, page_index in indexes.items():
+        entries = [entry for entry, _ in page_index.occluded()]
+        if not entries:
+            continue
+
+        hidden = {id(entry.child) for entry in entries}
+        layout = plate.pages[number].layout
+        layout.children = [c for c in layout.children if id(c) not in hidden]
+        dropped.extend(entries)
+
+    removed = {(entry.page, entry.id) for entry in dropped}
+    if removed:
+        automations = []
+        for automation in plate.automations:
+            found = collect(automation_attributes(automation), set())
+            if not found or not found <= removed:
+                automations.append(automation)
+        plate.automations = automations
+    return dropped
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, fields
+from dataclasses import dataclass, field, fields, make_dataclass
 from enum import Enum
 from typing import Annotated
 
 from . import types
 
 
-@dataclass
+# colors are shared between styles and themes, so they can't be changed in
+# place
+@dataclass(slots=True, frozen=True)
 class Color:
-    r: Annotated[int, types.Annotated[int, types.int8]]
-    g: Annotated[int, types.Annotated[int, types.int8]]
-    b: Annotated[int, types.Annotated[int, types.int8]]
+    r: Annotated[int, types.uint8]
+    g: Annotated[int, types.uint8]
+    b: Annotated[int, types.uint8]
 
     @classmethod
     def from_hex(cls, hex_value: str) -> Color:
@@ -95,9 +97,44 @@ class ObjectStyleState(JSONEncodableEnum):
     DISABLED_TOGGLED = 5
 
 
+def style_property(key):
+    """
+    The style property a serialized style key sets, without the two digit
+    part/state suffix it may carry, e.g. `text_font` for `text_font10`.
+    """
+    return key[:-2] if key[-2:].isdigit() else key
+
+
+def _compile_style_encoder(cls):
+    """
+    Generate a function that serializes the non-None style properties of the
+    dataclass `cls`, appending the part/state `suffix` to each property name.
+    """
+    lines = ["def encode(self, suffix):", "    j = {}"]
+    for f in fields(cls):
+        if f.name.startswith("_") or f.name in ("part", "state"):
+            continue
+        lines.append(f"    value = self.{f.name}")
+        lines.append("    if value is not None:")
+        lines.append(
+            f"        j[{f.name!r} + suffix] = getattr(value, 'json', value)"
+        )
+    lines.append("    return j")
+
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    encode = namespace["encode"]
+    encode.__qualname__ = f"{cls.__qualname__}._json_encoder"
+    return encode
+
+
+@dataclass(slots=True)
 class ObjectStyleBase:
-    part: ObjectStylePart = None
-    state: ObjectStyleState = None
+    # keyword only, so the style properties stay the positional arguments
+    part: ObjectStylePart = field(default=None, kw_only=True)
+    state: ObjectStyleState = field(default=None, kw_only=True)
+    # the ObjectStyles holding this style, see `_track`
+    _owner: ObjectStyles = field(default=None, init=False, repr=False, compare=False)
 
     def apply(self, s):
         if isinstance(s, ObjectStylePart):
@@ -105,44 +142,35 @@ class ObjectStyleBase:
         elif isinstance(s, ObjectStyleState):
             self.state = s
 
+    @classmethod
+    def _encoder(cls):
+        encoder = cls.__dict__.get("_json_encoder")
+        if encoder is None:
+            encoder = _compile_style_encoder(cls)
+            cls._json_encoder = encoder
+        return encoder
+
     @property
     def json(self):
-        j = {}
-        for f in fields(self):
-            if f.name.startswith("_"):
-                continue
-
-            if f.name in ("part", "state"):
-                continue
-
-            value = getattr(self, f.name)
-            if value is not None:
-                name = f.name
-                descriptor = 0
+        descriptor = 0
 
-                if self.part:
-                    descriptor += self.part.value
+        if self.part:
+            descriptor += self.part.value
 
-                if self.state:
-                    descriptor += self.state.value
+        if self.state:
+            descriptor += self.state.value
 
-                if descriptor:
-                    name = f"{f.name}{descriptor:02d}"
+        suffix = f"{descriptor:02d}" if descriptor else ""
+        return self._encoder()(self, suffix)
 
-                if hasattr(value, "json"):
-                    value = value.json
 
-                j[name] = value
-        return j
-
-
-@dataclass
+@dataclass(slots=True)
 class GeneralStyle(ObjectStyleBase):
-    radius: Annotated[int, types.Annotated[int, types.int16]] = None
+    radius: Annotated[int, types.int16] = None
     clip_corner: bool = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PaddingAndMarginStyle(ObjectStyleBase):
     pad_top: Annotated[int, types.int16] = None
     pad_bottom: Annotated[int, types.int16] = None
@@ -155,65 +183,65 @@ class PaddingAndMarginStyle(ObjectStyleBase):
     margin_right: Annotated[int, types.int16] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BackgroundStyle(ObjectStyleBase):
-    bg_opa: Annotated[int, types.Annotated[int, types.int8]] = None
+    bg_opa: Annotated[int, types.uint8] = None
     bg_color: Color = None
     bg_grad_color: Color = None
     bg_grad_dir: GradientDirection = None
-    bg_grad_stop: Annotated[int, types.Annotated[int, types.int8]] = None
-    bg_main_stop: Annotated[int, types.Annotated[int, types.int8]] = None
+    bg_grad_stop: Annotated[int, types.uint8] = None
+    bg_main_stop: Annotated[int, types.uint8] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BorderStyle(ObjectStyleBase):
     border_color: Color = None
-    border_opa: Annotated[int, types.Annotated[int, types.int8]] = None
-    border_width: Annotated[int, types.Annotated[int, types.int8]] = None
+    border_opa: Annotated[int, types.uint8] = None
+    border_width: Annotated[int, types.int8] = None
     border_side: BorderSide = None
     border_post: bool = None
 
 
-@dataclass
+@dataclass(slots=True)
 class OutlineStyle(ObjectStyleBase):
     outline_color: Color = None
-    outline_opa: Annotated[int, types.Annotated[int, types.int8]] = None
-    outline_width: Annotated[int, types.Annotated[int, types.int8]] = None
-    outline_pad: Annotated[int, types.Annotated[int, types.int16]] = None
+    outline_opa: Annotated[int, types.uint8] = None
+    outline_width: Annotated[int, types.int8] = None
+    outline_pad: Annotated[int, types.int16] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ShadowStyle(ObjectStyleBase):
     shadow_color: Color = None
-    shadow_opa: Annotated[int, types.Annotated[int, types.int8]] = None
+    shadow_opa: Annotated[int, types.uint8] = None
     shadow_width: Annotated[int, types.int16] = None
     shadow_ofs_x: Annotated[int, types.int16] = None
     shadow_ofs_y: Annotated[int, types.int16] = None
-    shadow_spread: Annotated[int, types.Annotated[int, types.int8]] = None
+    shadow_spread: Annotated[int, types.int8] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TextStyle(ObjectStyleBase):
     text_color: Color = None
     text_font: str = None
-    text_opa: Annotated[int, types.Annotated[int, types.int8]] = None
+    text_opa: Annotated[int, types.uint8] = None
     text_letter_space: Annotated[int, types.int16] = None
     text_line_space: Annotated[int, types.int16] = None
     text_decor: TextDecor = None
     text_sel_color: Color = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LineStyle(ObjectStyleBase):
     line_color: Color = None
-    line_opa: Annotated[int, types.Annotated[int, types.int8]] = None
+    line_opa: Annotated[int, types.uint8] = None
     line_width: Annotated[int, types.int16] = None
     line_rounded: bool = None
     line_dash_width: Annotated[int, types.int16] = None
     line_dash_gap: Annotated[int, types.int16] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ScaleStyle(ObjectStyleBase):
     scale_grad_color: Color = None
     scale_end_color: Color = None
@@ -223,15 +251,14 @@ class ScaleStyle(ObjectStyleBase):
     scale_end_border_width: Annotated[int, types.int16] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageStyle(ObjectStyleBase):
-    image_opa: Annotated[int, types.Annotated[int, types.int8]] = None
+    image_opa: Annotated[int, types.uint8] = None
     image_recolor: Color = None
-    image_recolor_opa: Annotated[int, types.Annotated[int, types.int8]] = None
+    image_recolor_opa: Annotated[int, types.uint8] = None
 
 
-@dataclass
-class ObjectStyle(
+STYLE_GROUPS = (
     GeneralStyle,
     PaddingAndMarginStyle,
     BackgroundStyle,
@@ -242,8 +269,60 @@ class ObjectStyle(
     LineStyle,
     ScaleStyle,
     ImageStyle,
-):
-    pass
+)
+
+
+def _combine(name, groups):
+    """
+    Make a slotted dataclass with the properties of all style `groups`, in
+    the order inheriting from all of them would give. Slotted classes can
+    only have one base with slots, so the groups are not its bases.
+    """
+    base = {f.name for f in fields(ObjectStyleBase)}
+    properties = [
+        (f.name, f.type, field(default=f.default))
+        for group in reversed(groups)
+        for f in fields(group)
+        if f.name not in base
+    ]
+    cls = make_dataclass(name, properties, bases=(ObjectStyleBase,), slots=True)
+    # annotations are strings, resolved against this module
+    cls.__module__ = __name__
+    return cls
+
+
+ObjectStyle = _combine("ObjectStyle", STYLE_GROUPS)
+
+_tracked_classes = {}
+
+
+def _tracked_setattr(self, name, value):
+    object.__setattr__(self, name, value)
+    if name[0] != "_" and self._owner is not None:
+        self._owner.invalidate()
+
+
+def _track(style, owner):
+    """
+    Have `style` invalidate `owner` when one of its properties is changed in
+    place. The style is switched to a subclass adding a __setattr__ hook,
+    so building styles doesn't pay for it.
+    """
+    cls = type(style)
+    tracked = _tracked_classes.get(cls)
+    if tracked is None:
+        tracked = _tracked_classes[cls] = type(
+            cls.__name__,
+            (cls,),
+            dict(
+                __slots__=(),
+                __setattr__=_tracked_setattr,
+                __module__=cls.__module__,
+                __qualname__=cls.__qualname__,
+            ),
+        )
+    style._owner = owner
+    style.__class__ = tracked
 
 
 class ObjectStyles:
@@ -252,30 +331,40 @@ class ObjectStyles:
         self.obj = obj
         self.styles = []
         self.profile = None
+        self._profile_json = None
+        self._theme = None
+        self._json = None
+
+    def invalidate(self):
+        self._json = None
+        self.obj._invalidate()
 
     def use_profile(self, profile="defaults"):
         self.profile = profile
+        self._profile_json = None
+        self.invalidate()
         return self.obj
 
     def finalize_styles(self):
-        if not self.profile:
-            return
-
-        if not getattr(self.obj.plate, "theme"):
-            return
-
-        profile_styles = self.obj.plate.theme.styles_for(self.profile)
-        for target, styles in profile_styles.items():
-            s = ObjectStyle(**styles)
-
-            targets = [target]
-            if isinstance(target, (list, tuple)):
-                targets = target
-
-            for target in targets:
-                s.apply(target)
-
-            self.styles.append(s)
+        """
+        Resolve the profile against the plate's theme. The theme caches the
+        serialized profile, so this only re-resolves when the profile or the
+        plate's theme changes.
+        """
+        theme = getattr(getattr(self.obj, "plate", None), "theme", None)
+        if not self.profile or not theme:
+            if self._theme is not None:
+                self._profile_json = None
+                self._theme = None
+                self.invalidate()
+            return {}
+
+        if self._profile_json is None or self._theme is not theme:
+            self._profile_json = theme.json_for(self.profile)
+            self._theme = theme
+            self.invalidate()
+
+        return self._profile_json
 
     def set(
         self,
@@ -284,16 +373,23 @@ class ObjectStyles:
         **styles,
     ):
         if len(styles):
-            s = ObjectStyle(**styles)
-            s.part = part
-            s.state = state
+            s = ObjectStyle(
+                part=part,
+                state=state,
+                **{k: types.intern(v) for k, v in styles.items()},
+            )
+            _track(s, self)
             self.styles.append(s)
+            self.invalidate()
         return self.obj
 
     @property
     def json(self):
-        self.finalize_styles()
-        j = {}
-        for style in self.styles:
-            j.update(style.json)
-        return j
+        profile_json = self.finalize_styles()
+        if self._json is None:
+            j = {}
+            for style in self.styles:
+                j.update(style.json)
+            j.update(profile_json)
+            self._json = j
+        return dict(self._json)
@@ -1,3 +1,5 @@
+from types import MappingProxyType
+
 import openhasp
 
 
@@ -108,6 +110,44 @@ class Theme:
     def styles_for(self, profile):
         return self.styles.get(profile, self.styles["default"])
 
+    def json_for(self, profile):
+        """
+        Return the serialized styles for `profile` as a read-only mapping.
+        Each profile is resolved once per theme and the same mapping is shared
+        by every object using it; call `clear_cache` after editing `styles`.
+        """
+        cache = self.__dict__.setdefault("_json_cache", {})
+        fragment = cache.get(profile)
+        if fragment is None:
+            j = {}
+            for target, styles in self.styles_for(profile).items():
+                s = openhasp.styling.ObjectStyle(**styles)
+
+                targets = [target]
+                if isinstance(target, (list, tuple)):
+                    targets = target
+
+                for target in targets:
+                    s.apply(target)
+
+                j.update(s.json)
+            fragment = cache[profile] = MappingProxyType(j)
+        return fragment
+
+    def clear_cache(self):
+        self.__dict__.pop("_json_cache", None)
+
+    def fast(self, budget=None):
+        """
+        Return a variant of this theme without its most expensive styles,
+        see `cost.fast_theme`.
+        """
+        from openhasp import cost
+
+        if budget is None:
+            budget = cost.FAST_BUDGET
+        return cost.fast_theme(self, budget)
+
 
 class Dracula(Theme):
     colors = dict(
@@ -1,3 +1,4 @@
+import sys
 from dataclasses import dataclass
 
 
@@ -17,3 +18,12 @@ int8 = ValueRange(-128, 128)
 int16 = ValueRange(-32767, 32767)
 angle = ValueRange(0, 360)
 on_off = ValueRange(0, 1)
+object_id = ValueRange(1, 254)
+
+
+def intern(value):
+    """
+    Intern strings such as fonts, colors and templates, which are repeated
+    across many objects, so equal values share one instance.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
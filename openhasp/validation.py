@@ -0,0 +1,155 @@
+import typing
+from dataclasses import dataclass, fields
+
+from . import columnar, styling, types
+
+
+@dataclass(slots=True)
+class Violation:
+    plate: str
+    page: int
+    id: int
+    obj: str
+    path: str
+    value: object
+    message: str
+
+    def __str__(self):
+        return (
+            f"{self.plate} p{self.page}b{self.id} ({self.obj}) "
+            f"{self.path}={self.value!r}: {self.message}"
+        )
+
+
+class ValidationError(ValueError):
+    def __init__(self, violations):
+        self.violations = violations
+        lines = [f"{len(violations)} invalid value(s):"]
+        lines.extend(str(v) for v in violations)
+        super().__init__("\n".join(lines))
+
+
+def _ranges(cls):
+    """
+    Map the fields of dataclass `cls` annotated with a `types.ValueRange` to
+    that range.
+    """
+    hints = typing.get_type_hints(cls, include_extras=True)
+    ranges = {}
+    for f in fields(cls):
+        hint = hints.get(f.name)
+        for meta in getattr(hint, "__metadata__", ()):
+            if isinstance(meta, types.ValueRange):
+                ranges[f.name] = meta
+    return ranges
+
+
+def _compile_checker(cls):
+    """
+    Generate a function that checks the range-annotated fields of `cls`,
+    calling `report(name, value, message)` for each bad value.
+    """
+    namespace = {"_is_integer": _is_integer}
+    lines = ["def check(obj, report):"]
+    for name, value_range in _ranges(cls).items():
+        bounds = f"{value_range.min} <= value <= {value_range.max}"
+        lines.extend(
+            [
+                f"    value = obj.{name}",
+                "    if value is not None:",
+                "        if not _is_integer(value):",
+                f"            report({name!r}, value, 'must be an integer')",
+                f"        elif not {bounds}:",
+                f"            report({name!r}, value, "
+                f"'must be in range [{value_range.min}, {value_range.max}]')",
+            ]
+        )
+    lines.append("    pass")
+
+    exec("\n".join(lines), namespace)
+    return namespace["check"]
+
+
+def _is_integer(value):
+    if isinstance(value, int):
+        return True
+    return isinstance(value, float) and value.is_integer()
+
+
+_checkers = {}
+_style_ranges = None
+
+
+def checker_for(cls):
+    checker = _checkers.get(cls)
+    if checker is None:
+        checker = _checkers[cls] = _compile_checker(cls)
+    return checker
+
+
+def style_ranges():
+    global _style_ranges
+    if _style_ranges is None:
+        _style_ranges = _ranges(styling.ObjectStyle)
+    return _style_ranges
+
+
+def validate_styles(styles, report):
+    """
+    Check serialized style properties, including part/state suffixed ones
+    such as `bg_opa10`, against the ranges of `ObjectStyle`.
+    """
+    ranges = style_ranges()
+    for key, value in styles.items():
+        name = styling.style_property(key)
+        value_range = ranges.get(name)
+        if value_range is None or not isinstance(value, (int, float)):
+            continue
+        if not _is_integer(value):
+            report(f"styles.{key}", value, "must be an integer")
+        elif not value_range.min <= value <= value_range.max:
+            report(
+                f"styles.{key}",
+                value,
+                f"must be in range [{value_range.min}, {value_range.max}]",
+            )
+
+
+def validate(plate):
+    """
+    Check every object of `plate` against the `types.ValueRange` annotations
+    of its class and of its styles, returning a list of `Violation`s.
+    """
+    from . import Object
+
+    violations = []
+    seen = set()
+    for page in plate.pages:
+        for child in page.children:
+            if id(child) in seen:
+                continue
+            seen.add(id(child))
+
+            if isinstance(child, columnar.ObjectView):
+                cls = child.kind
+            elif isinstance(child, Object):
+                cls = type(child)
+            else:
+                continue
+
+            def report(path, value, message, child=child):
+                violations.append(
+                    Violation(
+                        plate.name,
+                        child.page,
+                        child.id,
+                        child.obj,
+                        path,
+                        value,
+                        message,
+                    )
+                )
+
+            checker_for(cls)(child, report)
+            validate_styles(child.styles.json, report)
+    return violations
@@ -1,20 +1,111 @@
-import openhasp as hasp
-# from plates import retroshow as _  # noqa
-from plates import frontroom as _  # noqa
-from plates import office as _  # noqa
-from plates import theater as _  # noqa
+import argparse
 
-print("Generating plate jsonl for all plates ...")
-for name, jsonl in hasp.plates.jsonl.items():
-    with open(f"output/plate-{name}.jsonl", "w") as f:
-        f.write(jsonl)
+from openhasp import budget, emitter, validation
+from openhasp.build import build
 
-print("Generating 'openhasp.yaml' ...")
-with open("output/openhasp.yaml", "w") as f:
-    f.write(hasp.plates.hass_yaml)
+PLATES = [
+    # "plates.retroshow",
+    "plates.frontroom",
+    "plates.office",
+    "plates.theater",
+]
 
-print("Generating 'openhasp_automations.yaml' ...")
-with open("output/openhasp_automations.yaml", "w") as f:
-    f.write(hasp.plates.hass_automations_yaml)
 
-print("Done!")
+def main():
+    parser = argparse.ArgumentParser(description="Generate openHASP plates.")
+    parser.add_argument("-o", "--output", default="output")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of plate modules to build in parallel (default: CPU count)",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="rebuild every plate, ignoring the build cache",
+    )
+    parser.add_argument(
+        "--yaml-backend",
+        choices=emitter.BACKENDS,
+        default=None,
+        help="YAML emitter for the Home Assistant files (default: libyaml)",
+    )
+    parser.add_argument(
+        "--stable-ids",
+        action="store_true",
+        help="keep object IDs stable across builds using persisted ID maps, "
+        "keyed by parent, class and text (see openhasp.ids.object_key)",
+    )
+    parser.add_argument(
+        "--snap-grid",
+        action="store_true",
+        help="place grid layout objects on whole pixels",
+    )
+    parser.add_argument(
+        "--hoist",
+        action="store_true",
+        help="move objects repeated on every page onto page 0",
+    )
+    parser.add_argument(
+        "--fast-theme",
+        type=float,
+        metavar="BUDGET",
+        help="drop theme styles costing more than BUDGET times a plain fill",
+    )
+    parser.add_argument(
+        "--page-path",
+        metavar="DIR",
+        help="also write one file per page, loaded on demand from DIR on the "
+        "Home Assistant host",
+    )
+    parser.add_argument(
+        "--consolidate-matrices",
+        action="store_true",
+        help="emit one automation per button matrix instead of one per button",
+    )
+    parser.add_argument(
+        "--router",
+        action="store_true",
+        help="replace each plate's button matrix automations with one MQTT "
+        "router automation",
+    )
+    parser.add_argument(
+        "--budget",
+        metavar="FILE",
+        help="JSON file of resource limits the plates must stay within",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="fail when a plate contains values outside their valid range",
+    )
+    args = parser.parse_args()
+
+    print("Generating plates ...")
+    try:
+        build(
+            PLATES,
+            output_dir=args.output,
+            jobs=args.jobs,
+            use_cache=not args.force,
+            yaml_backend=args.yaml_backend,
+            stable_ids=args.stable_ids,
+            snap_grid=args.snap_grid,
+            hoist=args.hoist,
+            fast_budget=args.fast_theme,
+            page_path=args.page_path,
+            consolidate_matrices=args.consolidate_matrices,
+            router=args.router,
+            budgets=budget.load_budgets(args.budget) if args.budget else None,
+            strict=args.strict,
+        )
+    except (budget.BudgetError, validation.ValidationError) as e:
+        raise SystemExit(str(e))
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
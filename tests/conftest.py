@@ -0,0 +1,38 @@
+import pytest
+
+import openhasp
+from openhasp import GridLayout, Plate
+
+
+@pytest.fixture(autouse=True)
+def plate_registry():
+    """
+    Plates register themselves in `openhasp.plates` by name; restore the
+    registry after each test so plates do not leak between tests.
+    """
+    registered = dict(openhasp.plates.plates)
+    yield openhasp.plates
+    openhasp.plates.plates.clear()
+    openhasp.plates.plates.update(registered)
+
+
+@pytest.fixture
+def make_plate(request):
+    """
+    Return a factory creating a plate with a grid page for each title in
+    `titles` ("Home" by default). Plates are named after the test unless a
+    `name` is given; other keyword arguments are passed to `Plate`.
+    """
+    count = 0
+
+    def make(*titles, name=None, w=480, h=480, grid=(4, 4), **kwargs):
+        nonlocal count
+        count += 1
+        if name is None:
+            name = f"{request.node.name}-{count}"
+        plate = Plate(name, w, h, **kwargs)
+        for title in titles or ("Home",):
+            plate.page(GridLayout(*grid), title)
+        return plate
+
+    return make
@@ -0,0 +1,142 @@
+import pytest
+
+from openhasp import Image, Object, automation
+from openhasp.automation import (
+    ButtonMatrixAutomation,
+    MediaPlayerArtworkAutomation,
+    MediaPlayerRemoteAutomation,
+    OpenHASPConfigAutomation,
+    Scene,
+    Scenes,
+    SteamArtworkAutomation,
+)
+
+ACTIONS = [
+    ("light.toggle", "light.a"),
+    [("light.turn_on", "light.b", {"brightness": 10}), ("fan.toggle", "fan.c")],
+]
+
+
+@pytest.fixture
+def plate(make_plate):
+    return make_plate(name="plate")
+
+
+def pressed(automation):
+    # the button released and the actions run for it, by branch
+    return {
+        branch["conditions"][0]["value_template"]: branch["sequence"]
+        for branch in automation["action"][0]["choose"]
+    }
+
+
+def test_matrix_automation_per_button_and_action(plate):
+    plate.add_automation(ButtonMatrixAutomation("Lights", "p1b2", ACTIONS))
+    automations = plate.hass_automations()
+    assert [a["id"] for a in automations] == [
+        "plate_press_p1b2-0-0",
+        "plate_press_p1b2-1-0",
+        "plate_press_p1b2-1-1",
+    ]
+    assert automations[1]["action"] == {
+        "service": "light.turn_on",
+        "target": {"entity_id": "light.b"},
+        "data": {"brightness": 10},
+    }
+
+
+def test_consolidated_matrix_automation_dispatches_on_button(plate):
+    per_button = ButtonMatrixAutomation("Lights", "p1b2", ACTIONS)
+    plate.add_automation(per_button)
+    expected = plate.hass_automations()
+    per_button.consolidate = True
+
+    [automation] = plate.hass_automations()
+    assert automation["id"] == "plate_press_p1b2"
+    assert automation["mode"] == "queued"
+    assert automation["trigger"][0]["topic"] == "hasp/plate/state/p1b2"
+    assert automation["trigger"][0]["payload"] == "up"
+    assert pressed(automation) == {
+        "{{ trigger.payload_json.val == 0 }}": [expected[0]["action"]],
+        "{{ trigger.payload_json.val == 1 }}": [
+            expected[1]["action"],
+            expected[2]["action"],
+        ],
+    }
+
+
+def test_consolidated_remote_automation(plate):
+    actions = [("media_player.media_play", "media_player.tv", {})] * 2
+    plate.add_automation(
+        MediaPlayerRemoteAutomation("TV", "p2b3", actions, consolidate=True)
+    )
+    [automation] = plate.hass_automations()
+    assert automation["id"] == "plate_remote_press_p2b3"
+    assert len(pressed(automation)) == 2
+
+
+def test_router_replaces_matrix_automations(plate):
+    lights = ButtonMatrixAutomation("Lights", "p1b2", ACTIONS)
+    remote = MediaPlayerRemoteAutomation(
+        "TV", "p2b3", [("media_player.media_play", "media_player.tv", {})]
+    )
+    other = OpenHASPConfigAutomation("Other", "other", {"platform": "time"}, {})
+    for a in (lights, other, remote):
+        plate.add_automation(a)
+
+    assert len(plate.hass_automations()) == 5
+    automations = plate.hass_automations(router=True)
+    assert automations[0]["id"] == "plate_automation_other"
+    router = automations[-1]
+    assert len(automations) == 2
+    assert router["id"] == "plate_router"
+    assert router["trigger"][0]["topic"] == "hasp/plate/state/+"
+
+    branches = router["action"][0]["choose"]
+    assert [b["conditions"][0]["value_template"] for b in branches] == [
+        "{{ trigger.topic == 'hasp/plate/state/p1b2' }}",
+        "{{ trigger.topic == 'hasp/plate/state/p2b3' }}",
+    ]
+    assert branches[0]["sequence"] == [{"choose": lights.choose}]
+
+
+def test_router_follows_the_plate_setting(make_plate):
+    plate = make_plate(router=True)
+    plate.add_automation(ButtonMatrixAutomation("Lights", "p1b2", ACTIONS))
+    assert [a["id"] for a in plate.hass_automations()] == [f"{plate.name}_router"]
+    assert len(plate.hass_automations(router=False)) == 3
+
+
+def test_content_ids_are_deterministic():
+    assert automation.content_id("a", 1) == automation.content_id("a", 1)
+    assert automation.content_id("a", 1) != automation.content_id("a", 2)
+    assert len(automation.content_id("a", length=12)) == 12
+
+
+def scene_ids(monkeypatch, names):
+    # scenes register globally, so start from an empty registry
+    monkeypatch.setattr(automation, "scenes", Scenes())
+    return [Scene(name=name).id for name in names]
+
+
+def test_scene_ids_derive_from_names(monkeypatch):
+    ids = scene_ids(monkeypatch, ["Evening", "Movie", "Evening"])
+    assert ids == scene_ids(monkeypatch, ["Evening", "Movie", "Evening"])
+    assert ids[2] == f"{ids[0]}_2"
+    assert ids[1] != ids[0]
+    assert Scene(id="explicit").id == "explicit"
+
+
+def artwork_ids(make_plate, cls):
+    plate = make_plate(name="plate")
+    container = plate.add(Object(), 0, 0, 2, 2)
+    image = plate.add(Image(parentid=container.id))
+    plate.add_automation(cls("media_player.tv", image, container))
+    return [a["id"] for a in plate.hass_automations()]
+
+
+def test_artwork_automation_ids_are_stable(make_plate):
+    media = artwork_ids(make_plate, MediaPlayerArtworkAutomation)
+    assert media == artwork_ids(make_plate, MediaPlayerArtworkAutomation)
+    assert media[0].startswith("am-media_player.tv-")
+    assert media != artwork_ids(make_plate, SteamArtworkAutomation)
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from openhasp import Label, budget
+
+
+@pytest.fixture
+def plate(make_plate):
+    plate = make_plate("Overlay", "Home", w=400, h=400, grid=(2, 2))
+    plate.add(Label(text="abc"), 0, 0, 1, 1).styles.set(radius=2, bg_opa=255)
+    plate.add(Label(text="d"), 1, 0, 1, 1)
+    return plate
+
+
+def test_estimate_heap():
+    row = {"obj": "label", "text": "abc", "radius": 2, "bg_opa10": 255}
+    assert budget.style_properties(row) == 2
+    assert budget.estimate_heap(row) == (
+        budget.WIDGET_HEAP["label"] + 2 * budget.STYLE_PROPERTY_HEAP + 4
+    )
+
+
+def test_resources(plate):
+    report = budget.resources(plate)
+    assert report["objects"] == 2
+    assert report["style_properties"] == 2
+    assert [p["objects"] for p in report["pages"]] == [0, 2]
+    assert report["widgets"]["label"]["count"] == 2
+    assert report["bytes"] == sum(p["bytes"] for p in report["pages"])
+
+
+def test_check(plate):
+    report = budget.resources(plate)
+    assert budget.Budget(objects=2, heap=10000).check(report) == []
+    assert budget.Budget(page_objects=1).check(report) == [
+        f"{plate.name} page 1 page objects 2 exceeds budget of 1"
+    ]
+
+
+def test_load_budgets(tmp_path):
+    path = tmp_path / "budgets.json"
+    path.write_text(json.dumps({"heap": 100, "plates": {"big": {"heap": 1000}}}))
+    budget_for = budget.load_budgets(path)
+    assert budget_for("small") == budget.Budget(heap=100)
+    assert budget_for("big") == budget.Budget(heap=1000)
+
+    path.write_text(json.dumps({"memory": 100}))
+    with pytest.raises(ValueError, match="unknown budget limits: memory"):
+        budget.load_budgets(path)
+
+
+def test_budget_error():
+    error = budget.BudgetError(["a exceeds", "b exceeds"])
+    assert str(error) == "2 budget(s) exceeded:\na exceeds\nb exceeds"
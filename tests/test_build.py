@@ -0,0 +1,188 @@
+import importlib
+import os
+import sys
+
+import pytest
+import yaml
+
+from openhasp import Label, build
+
+PLATE_MODULE = """
+from openhasp import ButtonMatrix, GridLayout, Label, Plate
+from openhasp.automation import ButtonMatrixAutomation
+
+plate = Plate({name!r}, 480, 480)
+plate.page(GridLayout(2, 2), "Home")
+plate.add(Label(text={text!r}), 0, 0, 1, 1)
+matrix = plate.add(ButtonMatrix(options=["a", "b"]), 1, 0, 1, 1)
+plate.add_automation(
+    ButtonMatrixAutomation(
+        "Matrix",
+        f"p{{matrix.page}}b{{matrix.id}}",
+        [("light.toggle", "light.a"), ("light.toggle", "light.b")],
+    )
+)
+"""
+
+
+@pytest.fixture
+def plate_module(tmp_path, monkeypatch):
+    """
+    Return a function writing a plate module defining a plate of the same
+    name, importable for the rest of the test.
+    """
+    directory = tmp_path / "modules"
+    directory.mkdir()
+    monkeypatch.syspath_prepend(str(directory))
+    written = []
+
+    def write(name, text="text"):
+        (directory / f"{name}.py").write_text(PLATE_MODULE.format(name=name, text=text))
+        importlib.invalidate_caches()
+        written.append(name)
+        return name
+
+    yield write
+    for name in written:
+        sys.modules.pop(name, None)
+
+
+def run_build(modules, output_dir, **kwargs):
+    # plate modules register their plates when imported, so build them afresh
+    for name in modules:
+        sys.modules.pop(name, None)
+    log = []
+    names = build.build(modules, output_dir=str(output_dir), log=log.append, **kwargs)
+    return names, log
+
+
+def outputs(directory):
+    return {
+        path.name: path.read_text()
+        for path in directory.iterdir()
+        if path.name != build.CACHE_FILE
+    }
+
+
+@pytest.fixture
+def plate(make_plate):
+    plate = make_plate("Overlay", "One", "Two", grid=(2, 2))
+    for page in plate.pages:
+        plate.add(Label(text=page.title), 0, 0, 1, 1, page=page)
+    return plate
+
+
+def test_write_pages_leaves_unchanged_files(plate, tmp_path):
+    hashes = plate.write_pages(tmp_path)
+    assert sorted(hashes) == sorted(
+        [plate.boot_file] + [plate.page_file(n) for n in range(3)]
+    )
+
+    boot = tmp_path / plate.boot_file
+    os.utime(boot, (0, 0))
+    assert plate.write_pages(tmp_path) == hashes
+    assert boot.stat().st_mtime == 0
+
+    plate.pages[1].children[-1].text = "changed"
+    changed = plate.write_pages(tmp_path)
+    assert boot.stat().st_mtime != 0
+    assert changed[plate.page_file(2)] == hashes[plate.page_file(2)]
+    assert changed[plate.page_file(1)] != hashes[plate.page_file(1)]
+
+
+def test_cached_build_needs_current_page_files(plate, tmp_path):
+    (tmp_path / f"budget-{plate.name}.json").write_text("")
+    jsonl = build.write_plate_jsonl(plate, str(tmp_path / f"plate-{plate.name}.jsonl"))
+    page_files = plate.write_pages(tmp_path)
+    entry = dict(
+        source="source",
+        options={},
+        plates=[dict(name=plate.name, jsonl=jsonl, page_files=page_files)],
+    )
+    assert build._is_fresh(entry, "source", {}, tmp_path)
+
+    (tmp_path / plate.page_file(1)).write_text("edited")
+    assert not build._is_fresh(entry, "source", {}, tmp_path)
+
+    plate.write_pages(tmp_path)
+    os.remove(tmp_path / plate.boot_file)
+    assert not build._is_fresh(entry, "source", {}, tmp_path)
+
+
+def test_parallel_build_matches_serial_build(plate_module, tmp_path):
+    modules = [plate_module(f"parallel_{name}", name) for name in "abc"]
+
+    serial, _ = run_build(modules, tmp_path / "serial", jobs=1, use_cache=False)
+    parallel, _ = run_build(modules, tmp_path / "parallel", jobs=3, use_cache=False)
+
+    assert serial == parallel == modules
+    assert outputs(tmp_path / "parallel") == outputs(tmp_path / "serial")
+    yaml = (tmp_path / "parallel" / "openhasp.yaml").read_text()
+    assert [yaml.index(name) for name in modules] == sorted(
+        yaml.index(name) for name in modules
+    )
+
+
+def test_build_cache_skips_unchanged_modules(plate_module, tmp_path):
+    modules = [plate_module("cached_a"), plate_module("cached_b")]
+    output = tmp_path / "output"
+    run_build(modules, output, jobs=1)
+    jsonl = output / "plate-cached_a.jsonl"
+    os.utime(jsonl, (0, 0))
+
+    names, log = run_build(modules, output, jobs=1)
+    assert names == modules
+    assert log.count("Skipping unchanged plate module 'cached_a'") == 1
+    assert jsonl.stat().st_mtime == 0
+
+    plate_module("cached_b", "edited")
+    _, log = run_build(modules, output, jobs=1)
+    assert "Skipping unchanged plate module 'cached_a'" in log
+    assert "Generated plate 'cached_b' (cached_b)" in log
+    assert "edited" in (output / "plate-cached_b.jsonl").read_text()
+
+
+def test_build_cache_rebuilds_edited_plate_files(plate_module, tmp_path):
+    modules = [plate_module("edited_jsonl")]
+    output = tmp_path / "output"
+    run_build(modules, output, jobs=1)
+    jsonl = output / "plate-edited_jsonl.jsonl"
+    expected = jsonl.read_text()
+
+    jsonl.write_text("edited")
+    _, log = run_build(modules, output, jobs=1)
+    assert not any(line.startswith("Skipping") for line in log)
+    assert jsonl.read_text() == expected
+
+
+def test_build_cache_follows_options_and_outputs(plate_module, tmp_path):
+    modules = [plate_module("options_a")]
+    output = tmp_path / "output"
+    run_build(modules, output, jobs=1)
+
+    _, log = run_build(modules, output, jobs=1, hoist=True)
+    assert not any(line.startswith("Skipping") for line in log)
+
+    os.remove(output / "budget-options_a.json")
+    _, log = run_build(modules, output, jobs=1, hoist=True)
+    assert not any(line.startswith("Skipping") for line in log)
+    assert (output / "budget-options_a.json").exists()
+
+    _, log = run_build(modules, output, jobs=1, hoist=True, use_cache=False)
+    assert not any(line.startswith("Skipping") for line in log)
+
+
+def test_build_consolidates_matrix_automations(plate_module, tmp_path):
+    modules = [plate_module("matrices")]
+    for consolidate, count in ((False, 2), (True, 1)):
+        run_build(modules, tmp_path, jobs=1, consolidate_matrices=consolidate)
+        automations = yaml.safe_load(
+            (tmp_path / "openhasp_automations.yaml").read_text()
+        )
+        assert len(automations) == count
+
+
+def test_build_routes_matrix_automations(plate_module, tmp_path):
+    run_build([plate_module("routed")], tmp_path, jobs=1, router=True)
+    automations = yaml.safe_load((tmp_path / "openhasp_automations.yaml").read_text())
+    assert [a["id"] for a in automations] == ["routed_router"]
@@ -0,0 +1,109 @@
+import dataclasses
+import json
+
+import pytest
+
+from openhasp import ButtonMatrix, GridLayout, Label, Object
+from openhasp.themes import Theme
+
+
+def rows(plate):
+    return [json.dumps(row) for row in plate.iter_rows()]
+
+
+def test_compact_keeps_rows(make_plate):
+    plate = make_plate(theme=Theme())
+    plate.add(Label(text="a"), 0, 0, 2, 1).styles.set(radius=4)
+    plate.add(ButtonMatrix(options=["x"]), 0, 1, 4, 2).styles.use_profile(
+        "control-matrix"
+    )
+    expected = rows(plate)
+
+    plate.compact()
+    assert rows(plate) == expected
+
+
+def test_view_provides_object_api(make_plate):
+    plate = make_plate()
+    plate.add(ButtonMatrix(), 0, 0, 4, 4)
+    plate.compact()
+
+    view = plate.pages[0].children[-1]
+    assert isinstance(view, Object)
+    assert isinstance(view, ButtonMatrix)
+
+    view.add_row("b")
+    view._invalidate()
+    assert view.json["options"] == ["b", "\n"]
+
+
+def test_view_changes_invalidate_hass(make_plate):
+    plate = make_plate()
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    label.hass.inherit_value_from_template("text", "{{ 1 }}")
+    plate.compact()
+
+    view = plate.pages[0].children[-1]
+    view.hass.yaml
+    view.page = 2
+    assert view.hass._yaml is None
+    assert view.hass.yaml["obj"] == "p2b1"
+
+
+def test_profile_follows_theme_changes(make_plate):
+    plate = make_plate(theme=Theme())
+    plate.add(Label(text="a"), 0, 0, 1, 1).styles.use_profile("floating-panel")
+    plate.compact()
+    view = plate.pages[0].children[-1]
+    assert view.json["shadow_width"] == 10
+
+    plate.set_theme(plate.theme.fast())
+    assert view.json.get("shadow_width", 0) == 0
+
+    view.styles.use_profile("default")
+    assert "radius" not in view.json
+
+
+def test_view_is_a_dataclass(make_plate):
+    plate = make_plate()
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    expected = repr(label)
+    plate.compact()
+
+    view = plate.pages[0].children[-1]
+    assert dataclasses.is_dataclass(view)
+    assert dataclasses.fields(view) == dataclasses.fields(Label)
+    assert dataclasses.asdict(view)["text"] == "a"
+    assert repr(view) == expected
+
+
+def test_edits_after_compact_reach_the_output(make_plate):
+    plate = make_plate(theme=Theme())
+    plate.add(Label(text="a"), 0, 0, 1, 1).styles.use_profile("floating-panel")
+    plate.compact()
+    view = plate.pages[0].children[-1]
+    cached = plate.jsonl
+
+    view.text = "b"
+    assert json.loads(view.jsonl)["text"] == "b"
+    view.styles.set(text_letter_space=3)
+    assert json.loads(view.jsonl)["text_letter_space"] == 3
+    plate.set_theme(plate.theme.fast())
+    assert json.loads(view.jsonl).get("shadow_width", 0) == 0
+    assert plate.jsonl != cached
+
+
+def test_views_can_be_added_again(make_plate):
+    plate = make_plate()
+    plate.add(Label(text="a"), 0, 0, 1, 1)
+    plate.compact()
+    view = plate.pages[0].children[-1]
+
+    page = plate.page(GridLayout(4, 4), "Other")
+    plate.add(view, 1, 1, 1, 1, page=page)
+    assert (view.page, view.x) == (1, 120)
+    assert view.plate is plate
+    assert json.loads(view.jsonl)["page"] == 1
+
+    with pytest.raises(ValueError):
+        make_plate().add(view, 0, 0, 1, 1)
@@ -0,0 +1,41 @@
+from openhasp import diff
+
+
+def row(id, **values):
+    return dict(obj=values.pop("obj", "btn"), id=id, page=1, **values)
+
+
+def test_updates_only_changed_properties():
+    result = diff.diff(
+        [row(1, text="a", x=0), row(2, text="b")],
+        [row(1, text="c", x=0), row(2, text="b")],
+    )
+    assert result.updates == [{"page": 1, "id": 1, "text": "c"}]
+    assert not result.creates and not result.deletes
+
+
+def test_creates_and_deletes():
+    result = diff.diff([row(1), row(2)], [row(1), row(3)])
+    assert result.creates == [row(3)]
+    assert result.deletes == [(1, 2)]
+    assert result.commands[0] == "p1b2.delete"
+
+
+def test_type_change_recreates_children():
+    deployed = [row(1, obj="obj"), row(2, parentid=1), row(3, parentid=2)]
+    generated = [row(1, obj="label"), row(2, parentid=1), row(3, parentid=2)]
+    result = diff.diff(deployed, generated)
+    assert result.creates == generated
+    # deleting the parent deletes its descendants on the device
+    assert result.deletes == [(1, 1)]
+
+
+def test_lost_property_recreates():
+    result = diff.diff([row(1, text="a", hidden=True)], [row(1, text="a")])
+    assert result.creates == [row(1, text="a")]
+    assert result.deletes == [(1, 1)]
+
+
+def test_rows_inherit_page():
+    objects = diff.index_rows([{"page": 2, "comment": "x"}, {"obj": "btn", "id": 1}])
+    assert objects == {(2, 1): {"obj": "btn", "id": 1, "page": 2}}
@@ -0,0 +1,28 @@
+import math
+
+import pytest
+import yaml
+
+from openhasp import emitter
+
+DATA = {
+    "floats": [0.5, 1e-05, 1.5e16, 1e16, -2.0, math.inf, -math.inf],
+    "ints": [0, -3, 255],
+    "strings": ["on", "p1b2", "1.0", ".inf", "text with: colon", ""],
+    "flags": [True, False, None],
+    "nested": {"a": [{"b": 1.25}], "c": {}},
+}
+
+
+@pytest.mark.parametrize("backend", ["direct", "python"])
+def test_round_trip(backend):
+    dumped = emitter.dump(DATA, backend=backend)
+    assert yaml.safe_load(dumped) == yaml.safe_load(yaml.dump(DATA))
+    assert yaml.safe_load(dumped) == DATA
+
+
+def test_floats_use_yaml_1_1_form():
+    assert emitter.emit([1e-05, math.inf, -math.inf, math.nan]) == (
+        "- 1.0e-05\n- .inf\n- -.inf\n- .nan\n"
+    )
+    assert math.isnan(yaml.safe_load(emitter.emit({"v": math.nan}))["v"])
@@ -0,0 +1,50 @@
+from dataclasses import fields
+
+import pytest
+
+from openhasp import Label, Object, styling
+
+
+def subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from subclasses(subclass)
+
+
+def reflected(obj):
+    # what the compiled encoders replace: a walk over the public fields
+    j = {}
+    for f in fields(obj):
+        value = getattr(obj, f.name)
+        if not f.name.startswith("_") and value is not None:
+            j[f.name] = value
+    return j
+
+
+@pytest.mark.parametrize(
+    "cls", [Object, *subclasses(Object)], ids=lambda cls: cls.__name__
+)
+def test_object_encoders_match_fields(cls):
+    obj = cls()
+    for i, f in enumerate(fields(obj)):
+        if not f.name.startswith("_") and getattr(obj, f.name) is None:
+            setattr(obj, f.name, i)
+    assert cls._encoder()(obj) == reflected(obj)
+
+
+def test_encoders_are_compiled_per_class():
+    assert Label._encoder() is Label._encoder()
+    assert Label._encoder() is not Object._encoder()
+    assert "text" in Label._encoder()(Label(text="a"))
+
+
+def test_style_encoder_suffixes_and_encodes_values():
+    style = styling.ObjectStyle(
+        bg_opa=10,
+        bg_color=styling.color("#102030"),
+        part=styling.ObjectStylePart.ITEMS,
+        state=styling.ObjectStyleState.PRESSED,
+    )
+    suffix = f"{style.part.value + style.state.value:02d}"
+    assert style.json == {f"bg_opa{suffix}": 10, f"bg_color{suffix}": "#102030"}
+    assert styling.ObjectStyle(radius=2).json == {"radius": 2}
@@ -0,0 +1,45 @@
+from openhasp import Button, Label
+from openhasp.automation import OpenHASPConfigAutomation
+
+
+TITLES = ("Overlay", "Page 1", "Page 2", "Page 3")
+
+
+def header_automation(header):
+    return OpenHASPConfigAutomation(
+        "Header",
+        "header",
+        {"platform": "mqtt", "topic": f"hasp/plate/state/p{header.page}b{header.id}"},
+        {"service": "light.toggle"},
+    )
+
+
+def populate(plate, differ=False):
+    for number in range(1, 4):
+        text = f"header {number}" if differ else "header"
+        header = plate.add(Label(text=text), 0, 0, 4, 1, page=number)
+        plate.add(Button(text=f"content {number}"), 0, 1, 4, 3, page=number)
+        plate.add_automation(header_automation(header))
+    return plate
+
+
+def test_hoist_moves_repeated_objects_to_page_zero(make_plate):
+    plate = populate(make_plate(*TITLES, w=400, h=400))
+    hoisted = plate.hoist()
+
+    assert [(o.page, o.text) for o in hoisted] == [(0, "header")]
+    for page in plate.pages[1:]:
+        assert [c.text for c in page.children if hasattr(c, "text")] == [
+            f"content {page.number}"
+        ]
+
+    # the automations now refer to the single copy and are kept once
+    assert len(plate.automations) == 1
+    topic = plate.automations[0].trigger["topic"]
+    assert topic == f"hasp/plate/state/p0b{hoisted[0].id}"
+
+
+def test_hoist_keeps_differing_objects(make_plate):
+    plate = populate(make_plate(*TITLES, w=400, h=400), differ=True)
+    assert plate.hoist() == []
+    assert len(plate.automations) == 3
@@ -0,0 +1,59 @@
+import json
+
+from openhasp import Button, Label, Object, ids
+
+
+def populate(plate, texts, before=()):
+    for text in before:
+        plate.add(Label(text=text), 0, 0, 1, 1)
+    panel = plate.add(Object(), 0, 1, 4, 3, key="panel")
+    for i, text in enumerate(texts):
+        plate.add(Label(text=text, parentid=panel.id, x=i * 10, y=0, w=10, h=10))
+    plate.add(Button(), 3, 3, 1, 1, key="clock")
+    if plate.id_map.path:
+        plate.id_map.save()
+    return plate
+
+
+def ids_by_key(plate):
+    return {c._key: c.id for c in plate.pages[0].children if hasattr(c, "_key")}
+
+
+def test_inserting_objects_keeps_ids(make_plate, tmp_path):
+    path = str(tmp_path / "ids.json")
+    first = ids_by_key(populate(make_plate(id_map=path), ["a", "b"]))
+    second = populate(make_plate(id_map=path), ["new", "a", "b"], before=["top"])
+    second = ids_by_key(second)
+    assert {key: second[key] for key in first} == first
+    assert len(set(second.values())) == len(second)
+
+
+def test_children_are_keyed_by_parent(make_plate):
+    plate = populate(make_plate(id_map=ids.IdMap()), ["a"])
+    label = plate.pages[0].children[-2]
+    assert label._key == 'panel > Label "a"'
+
+
+def test_objects_without_content_fall_back_to_order(make_plate):
+    plate = make_plate(id_map=ids.IdMap())
+    first, second = (plate.add(Object(), 0, i, 1, 1) for i in range(2))
+    assert first._key == second._key
+    assert plate.id_map.key_of(0, second.id) == f"{second._key} #2"
+
+
+def test_released_ids_are_reused(make_plate, tmp_path):
+    path = tmp_path / "ids.json"
+    first = ids_by_key(populate(make_plate(id_map=str(path)), ["a", "b", "c"]))
+    populate(make_plate(id_map=str(path)), ["a", "b"])
+    assert first['panel > Label "c"'] not in json.loads(path.read_text())["0"].values()
+    assert ids_by_key(populate(make_plate(id_map=str(path)), ["a", "b", "c"])) == first
+
+
+def test_objects_added_to_pages_directly_get_keys(make_plate):
+    plate = make_plate(id_map=ids.IdMap())
+    labels = [Label(text="a"), Label(text="b")]
+    for i, label in enumerate(labels):
+        plate.pages[0].add(label, i, 0, 1, 1)
+
+    assert labels[0].id != labels[1].id
+    assert labels[0]._key.endswith(' > Label "a"')
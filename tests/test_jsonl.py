@@ -0,0 +1,57 @@
+import io
+import json
+
+from openhasp import Label
+
+
+class RecordingFile(io.StringIO):
+    def __init__(self, labels):
+        super().__init__()
+        self.labels = labels
+        self.encoded = []
+
+    def write(self, s):
+        # how many labels were serialized when this was written
+        self.encoded.append(sum(label._jsonl is not None for label in self.labels))
+        return super().write(s)
+
+
+def populate(plate):
+    return [
+        plate.add(Label(text=str(i)), i % 4, i // 4, 1, 1, page=i % 2)
+        for i in range(8)
+    ]
+
+
+def test_write_jsonl_streams_rows(make_plate):
+    plate = make_plate("Overlay", "Home")
+    labels = populate(plate)
+    f = RecordingFile(labels)
+    plate.write_jsonl(f)
+
+    assert f.getvalue() == plate.jsonl
+    assert not f.getvalue().endswith("\n")
+    # rows are written as they are serialized, not after the whole plate
+    assert f.encoded[0] < len(labels)
+    assert f.encoded == sorted(f.encoded)
+
+
+def test_write_jsonl_selects_pages(make_plate):
+    plate = make_plate("Overlay", "Home")
+    populate(plate)
+    f = io.StringIO()
+    plate.write_jsonl(f, pages=[1])
+
+    rows = [json.loads(line) for line in f.getvalue().split("\n")]
+    assert rows[0] == {"page": 1, "comment": "Home"}
+    assert [row["text"] for row in rows[1:]] == ["1", "3", "5", "7"]
+
+
+def test_collection_writes_one_file_per_plate(make_plate, plate_registry, tmp_path):
+    plates = [make_plate("Overlay", "Home") for _ in range(2)]
+    for plate in plates:
+        populate(plate)
+    plate_registry.write_jsonl(tmp_path)
+
+    for plate in plates:
+        assert (tmp_path / f"plate-{plate.name}.jsonl").read_text() == plate.jsonl
@@ -0,0 +1,78 @@
+import os
+
+import openhasp
+from openhasp import GridLayout, Label, Object, Plate, ids
+
+
+def geometry(obj):
+    return (obj.x, obj.y, obj.w, obj.h)
+
+
+def test_snapped_grid_shares_edges(make_plate):
+    plate = make_plate(w=480, h=320, grid=(7, 3), snap_grid=True)
+    cells = [plate.add(Object(), c, 0, 1, 1) for c in range(7)]
+
+    assert all(isinstance(v, int) for obj in cells for v in geometry(obj))
+    for left, right in zip(cells, cells[1:]):
+        assert left.x + left.w == right.x
+    assert cells[-1].x + cells[-1].w == 480
+    assert cells[0].h == round(320 / 3)
+
+
+def test_unsnapped_grid_uses_whole_cells(make_plate):
+    plate = make_plate(w=480, h=320, grid=(7, 3))
+    obj = plate.add(Object(), 1, 1, 2, 1)
+    assert geometry(obj) == (68, 106, 136, 106)
+
+
+def test_snap_follows_the_plate(make_plate):
+    plate = make_plate(snap_grid=True)
+    assert plate.pages[0].layout.snap
+    page = plate.page(GridLayout(4, 4, snap=False), "Unsnapped")
+    assert not page.layout.snap
+    assert not make_plate().pages[0].layout.snap
+
+
+def test_plate_defaults_are_scoped(tmp_path):
+    with openhasp.plate_defaults(snap_grid=True, id_map_dir=str(tmp_path)):
+        inside = Plate("defaults-inside", 480, 480)
+        explicit = Plate("defaults-explicit", 480, 480, snap_grid=False)
+    after = Plate("defaults-after", 480, 480)
+
+    assert inside.snap_grid and not explicit.snap_grid and not after.snap_grid
+    assert isinstance(inside.id_map, ids.IdMap)
+    assert inside.id_map.path == os.path.join(tmp_path, "ids-defaults-inside.json")
+    assert after.id_map is None
+
+
+def test_add_many_matches_add(make_plate):
+    placements = [(Label(text=str(i)), i, i, 1, 1) for i in range(4)]
+    one_by_one = make_plate(snap_grid=True)
+    one_by_one.set_font("md_24", "#FFFFFF")
+    expected = [one_by_one.add(*placement) for placement in placements]
+    expected = [(o.id, geometry(o), o.json) for o in expected]
+
+    placements = [(Label(text=str(i)), i, i, 1, 1) for i in range(4)]
+    batch = make_plate(snap_grid=True)
+    batch.set_font("md_24", "#FFFFFF")
+    added = batch.add_many(placements)
+    assert [(o.id, geometry(o), o.json) for o in added] == expected
+
+
+def test_add_many_takes_keyword_arguments(make_plate):
+    plate = make_plate("Overlay", "Home", id_map=ids.IdMap())
+    plate.pages[1].layout.padding = (5, 5)
+    clock, other, overlay = plate.add_many(
+        [
+            (Label(text="clock"), 0, 0, 1, 1, {"key": "clock"}),
+            (Label(text="other"), 1, 0, 1, 1, {"ignore_padding": True}),
+            (Label(text="overlay"), 0, 0, 1, 1, {"page": 0}),
+        ],
+        key="labels",
+    )
+
+    assert clock._key == "clock" and other._key == "labels [1]"
+    assert (clock.page, other.page, overlay.page) == (1, 1, 0)
+    assert geometry(clock) == (5, 5, 110, 110)
+    assert geometry(other) == (120, 0, 120, 120)
+    assert overlay in plate.pages[0].children
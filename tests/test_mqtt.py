@@ -0,0 +1,73 @@
+import json
+
+from openhasp import diff, mqtt
+
+
+class FakeInfo:
+    def __init__(self, client):
+        self.client = client
+        self.published = False
+
+    def wait_for_publish(self):
+        self.published = True
+        self.client.acknowledged += 1
+
+
+class FakeClient:
+    def __init__(self):
+        self.messages = []
+        self.infos = []
+        self.acknowledged = 0
+        self.max_pending = 0
+
+    def publish(self, topic, payload, qos=0):
+        self.messages.append((topic, payload, qos))
+        info = FakeInfo(self)
+        self.infos.append(info)
+        pending = len(self.infos) - self.acknowledged
+        self.max_pending = max(self.max_pending, pending)
+        return info
+
+
+def test_batch_lines_respects_max_size():
+    lines = ["a" * 4, "b" * 4, "c" * 4, "d" * 20]
+    batches = list(mqtt.batch_lines(lines, 10))
+    assert batches == ["aaaa\nbbbb", "cccc", "d" * 20]
+
+
+def test_in_flight_messages_are_limited():
+    client = FakeClient()
+    publisher = mqtt.Publisher(client, max_batch_size=1, max_in_flight=3)
+    rows = [{"obj": "btn", "id": i, "page": 1} for i in range(1, 11)]
+
+    assert publisher.publish_rows("plate", rows) == 10
+    # the oldest message is waited on before one over the limit is published
+    assert client.max_pending == 3
+    assert all(info.published for info in client.infos)
+
+
+def test_publish_diff():
+    deployed = [
+        {"obj": "btn", "id": 1, "page": 1, "text": "a"},
+        {"obj": "btn", "id": 2, "page": 1, "text": "b"},
+    ]
+    generated = [
+        {"obj": "btn", "id": 1, "page": 1, "text": "c"},
+        {"obj": "label", "id": 3, "page": 1, "text": "d"},
+    ]
+    client = FakeClient()
+    publisher = mqtt.Publisher(client)
+
+    publisher.publish_diff("plate", diff.diff(deployed, generated))
+
+    assert client.messages[0] == ("hasp/plate/command", "p1b2.delete", 1)
+    rows = [
+        json.loads(line)
+        for topic, payload, _ in client.messages
+        if topic == "hasp/plate/command/jsonl"
+        for line in payload.split("\n")
+    ]
+    assert rows == [
+        {"obj": "label", "id": 3, "page": 1, "text": "d"},
+        {"page": 1, "id": 1, "text": "c"},
+    ]
@@ -0,0 +1,76 @@
+import dataclasses
+import json
+
+import pytest
+
+from openhasp import ButtonMatrix, Label, styling
+from openhasp.themes import Theme
+
+
+def test_jsonl_is_cached_until_a_field_changes(make_plate):
+    plate = make_plate()
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    cached = label.jsonl
+    assert label.jsonl is cached
+
+    label.text = "b"
+    assert label.jsonl is not cached
+    assert json.loads(label.jsonl)["text"] == "b"
+
+
+def test_private_attributes_keep_the_cache(make_plate):
+    plate = make_plate()
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    cached = label.jsonl
+    label._key = "label"
+    assert label.jsonl is cached
+
+
+def test_styles_invalidate_jsonl(make_plate):
+    plate = make_plate(theme=Theme())
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    label.jsonl
+    label.styles.set(radius=3)
+    assert json.loads(label.jsonl)["radius"] == 3
+
+    label.styles.use_profile("floating-panel")
+    assert json.loads(label.jsonl)["shadow_width"] == 10
+
+    plate.set_theme(plate.theme.fast())
+    assert json.loads(label.jsonl)["shadow_width"] == 0
+
+
+def test_in_place_changes_invalidate_jsonl(make_plate):
+    plate = make_plate()
+    matrix = plate.add(ButtonMatrix(), 0, 0, 2, 2)
+    matrix.jsonl
+    matrix.add_row("a", "b")
+    assert json.loads(matrix.jsonl)["options"] == ["a", "b", "\n"]
+
+
+def test_styles_changed_in_place_invalidate_jsonl(make_plate):
+    plate = make_plate()
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    label.styles.set(bg_opa=10, bg_color=styling.color("#000000"))
+    label.jsonl
+
+    label.styles.styles[0].bg_opa = 20
+    assert json.loads(label.jsonl)["bg_opa"] == 20
+    label.styles.styles[0].apply(styling.ObjectStyleState.PRESSED)
+    assert json.loads(label.jsonl)["bg_opa02"] == 20
+
+
+def test_colors_are_immutable():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        styling.color("#000000").r = 5
+
+
+def test_placed_objects_convert_to_dicts(make_plate):
+    plate = make_plate()
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    assert label.plate is plate
+
+    values = dataclasses.asdict(label)
+    assert values["text"] == "a"
+    assert "_plate" not in values and "_layout" not in values
+    assert dataclasses.replace(label, text="b").plate is None
@@ -0,0 +1,46 @@
+import pytest
+
+from openhasp import GridLayout, Label
+from openhasp.automation import OpenHASPConfigAutomation
+
+
+@pytest.fixture
+def plate(make_plate):
+    plate = make_plate("Overlay", "One", "Two", grid=(2, 2))
+    for page in plate.pages:
+        plate.add(Label(text=page.title), 0, 0, 1, 1, page=page)
+    return plate
+
+
+def test_insert_page_renumbers_objects(plate):
+    page = plate.insert_page(1, GridLayout(2, 2), "New")
+    label = plate.add(Label(text="new"), 0, 0, 1, 1, page=page)
+
+    assert [p.number for p in plate.pages] == [0, 1, 2, 3]
+    assert label.page == 1
+    assert label in plate.pages[1].children
+    assert [c.page for c in plate.pages[3].children] == [3, 3]
+
+    plate.add(Label(text="last"), 1, 1, 1, 1, page=3)
+    assert plate.pages[3].children[-1].text == "last"
+
+
+def test_insert_page_rewrites_automation_references(plate):
+    one, two = (p.children[-1] for p in plate.pages[1:])
+    automation = OpenHASPConfigAutomation(
+        "Toggle",
+        "toggle",
+        {"platform": "mqtt", "topic": f"hasp/plate/state/p{two.page}b{two.id}"},
+        {
+            "service": "mqtt.publish",
+            "data": {"payload": f"p{one.page}b{one.id}.hidden=1 p0b1.text=a"},
+        },
+    )
+    plate.add_automation(automation)
+
+    plate.insert_page(1, GridLayout(2, 2), "New")
+
+    assert automation.trigger["topic"] == f"hasp/plate/state/p3b{two.id}"
+    assert automation.action["data"]["payload"] == (
+        f"p2b{one.id}.hidden=1 p0b1.text=a"
+    )
@@ -0,0 +1,85 @@
+from openhasp import Arc, Label, Object
+from openhasp.automation import OpenHASPConfigAutomation
+from openhasp.retarget import scale_font, scale_pixels
+from openhasp.themes import Theme
+
+
+def populate(plate):
+    plate.add(Label(text="a", text_font="md_24"), 0, 0, 2, 1).styles.set(
+        shadow_width=10, border_width=4, text_letter_space=2
+    )
+    plate.add(Arc(value_font=24), 2, 0, 2, 2).styles.use_profile("floating-panel")
+    return plate
+
+
+def test_scale_font():
+    assert scale_font(24, 0.5) == 12
+    assert scale_font("md_24", 0.5) == "md_12"
+    assert scale_font("md_24", 0.5, sizes=(10, 16)) == "md_10"
+
+
+def test_scale_pixels_keeps_nonzero_sizes():
+    assert scale_pixels(1, 0.5) == 1
+    assert scale_pixels(-1, 0.4) == -1
+    assert scale_pixels(0, 0.5) == 0
+    assert scale_pixels(10, 0.5) == 5
+
+
+def test_retarget_keeps_thin_borders(make_plate):
+    plate = populate(make_plate(theme=Theme()))
+    plate.add(Label(), 0, 2, 1, 1).styles.set(border_width=1, outline_width=1)
+    small = plate.retarget("small", 240, 240)
+    label = small.pages[0].children[-1]
+    assert label.json["border_width"] == 1
+    assert label.json["outline_width"] == 1
+
+
+def test_retarget_keeps_neighbours_touching(make_plate):
+    plate = make_plate(grid=(3, 3))
+    for c in range(3):
+        plate.add(Object(), c, 0, 1, 1)
+    small = plate.retarget("small", 250, 250)
+
+    objects = small.pages[0].children[1:]
+    for left, right in zip(objects, objects[1:]):
+        assert left.x + left.w == right.x
+    assert objects[-1].x + objects[-1].w == 250
+
+
+def test_retarget_copies_automations_deeply(make_plate):
+    plate = populate(make_plate(theme=Theme()))
+    trigger = {"platform": "state", "entity_id": ["light.a"]}
+    plate.add_automation(OpenHASPConfigAutomation("A", "a", trigger, {}))
+    small = plate.retarget("small", 240, 240)
+
+    automation = small.automations[0]
+    assert automation.plate is small
+    assert automation.trigger == trigger
+    automation.trigger["entity_id"].append("light.b")
+    assert trigger["entity_id"] == ["light.a"]
+
+
+def test_retarget_scales_pixel_styles_and_fonts(make_plate):
+    plate = populate(make_plate(theme=Theme()))
+    small = plate.retarget("small", 240, 240)
+    label, arc = small.pages[0].children[-2:]
+
+    assert (label.x, label.y, label.w, label.h) == (0, 0, 120, 60)
+    assert label.text_font == "md_12"
+    assert label.json["shadow_width"] == 5
+    assert label.json["border_width"] == 2
+    assert label.json["text_letter_space"] == 1
+
+    assert arc.value_font == 12
+    # profiles are resolved before scaling
+    assert arc.json["shadow_width"] == 5
+    assert arc.json["shadow_ofs_x"] == 2
+    assert arc.json["radius"] == 5
+
+
+def test_retarget_compacted_plate(make_plate):
+    plate = populate(make_plate(theme=Theme()))
+    expected = populate(make_plate(theme=Theme())).retarget("expected", 240, 240)
+    plate.compact()
+    small = plate.retarget("small", 240, 240)
+    assert list(small.iter_rows()) == list(expected.iter_rows())
@@ -0,0 +1,78 @@
+import pytest
+
+from openhasp import Button, ButtonMatrix, Label, Object, Tab, TabView
+from openhasp.automation import ButtonMatrixAutomation, OpenHASPConfigAutomation
+
+
+@pytest.fixture
+def plate(make_plate):
+    return make_plate("Overlay", "Home", w=400, h=400)
+
+
+def pairs(index):
+    return {(a.id, b.id) for a, b in index.overlaps()}
+
+
+def test_overlaps(plate):
+    a = plate.add(Button(), 0, 0, 2, 2)
+    b = plate.add(Button(), 1, 1, 2, 2)
+    plate.add(Button(), 3, 3, 1, 1)
+    panel = plate.add(Object(), 0, 3, 1, 1)
+    plate.add(Label(parentid=panel.id, x=0, y=0, w=50, h=50))
+
+    assert pairs(plate.spatial_index()[1]) == {(a.id, b.id)}
+
+
+def test_tabs_are_exclusive(plate):
+    tabs = plate.add(TabView(), 0, 0, 4, 4)
+    for text in ("one", "two"):
+        tab = plate.add(Tab(text=text, parentid=tabs.id))
+        plate.add(Button(parentid=tab.id, x=10, y=10, w=50, h=50))
+
+    assert pairs(plate.spatial_index()[1]) == set()
+
+
+def test_out_of_bounds_and_occluded(plate):
+    hidden = plate.add(Label(text="under"), 0, 0, 1, 1)
+    cover = plate.add(Button(), 0, 0, 2, 2)
+    wide = plate.add(Button(x=350, y=0, w=100, h=50))
+
+    index = plate.spatial_index()[1]
+    assert [e.id for e in index.out_of_bounds()] == [wide.id]
+    assert [(e.id, o.id) for e, o in index.occluded()] == [(hidden.id, cover.id)]
+
+    dropped = plate.drop_occluded()
+    assert [e.id for e in dropped] == [hidden.id]
+    assert hidden not in plate.pages[1].children
+
+
+def test_drop_occluded_prunes_automations(plate):
+    hidden = plate.add(ButtonMatrix(options=["a"]), 0, 0, 1, 1)
+    plate.add(Button(), 0, 0, 2, 2)
+    shown = plate.add(ButtonMatrix(options=["b"]), 2, 2, 1, 1)
+    for matrix in (hidden, shown):
+        plate.add_automation(
+            ButtonMatrixAutomation(
+                "Matrix", f"p1b{matrix.id}", [("light.toggle", "light.a")]
+            )
+        )
+    # still refers to an object that is kept
+    both = OpenHASPConfigAutomation(
+        "Both",
+        "both",
+        {"platform": "state", "entity_id": "light.a"},
+        {"service": "openhasp.command", "data": [f"p1b{hidden.id}", f"p1b{shown.id}"]},
+    )
+    plate.add_automation(both)
+
+    plate.drop_occluded()
+    assert [a.matrix_id for a in plate.automations[:-1]] == [f"p1b{shown.id}"]
+    assert plate.automations[-1] is both
+
+
+def test_page_zero_covers_pages(plate):
+    label = plate.add(Label(text="under"), 0, 0, 1, 1, page=1)
+    cover = plate.add(Button(), 0, 0, 2, 2, page=0)
+
+    entries = plate.spatial_index()[1].occluded()
+    assert [(e.id, o.id, o.page) for e, o in entries] == [(label.id, cover.id, 0)]
@@ -0,0 +1,76 @@
+import pytest
+
+from openhasp import Label, styling
+from openhasp.themes import Theme
+
+STYLE_GROUPS = [*styling.STYLE_GROUPS, styling.ObjectStyle]
+
+
+@pytest.mark.parametrize("cls", STYLE_GROUPS, ids=lambda cls: cls.__name__)
+def test_style_groups_can_be_built(cls):
+    style = cls(part=styling.ObjectStylePart.ITEMS)
+    style.apply(styling.ObjectStyleState.PRESSED)
+    assert style.json == {}
+
+
+def test_style_group_json():
+    assert styling.BackgroundStyle(bg_opa=5).json == {"bg_opa": 5}
+    style = styling.ObjectStyle(bg_opa=5, radius=3)
+    style.apply(styling.ObjectStylePart.ITEMS)
+    assert style.json == {"bg_opa40": 5, "radius40": 3}
+
+
+def test_style_groups_take_properties_positionally():
+    assert styling.GeneralStyle(5).radius == 5
+    assert styling.GeneralStyle(5).part is None
+    assert styling.BorderStyle(None, 128).json == {"border_opa": 128}
+
+
+@pytest.mark.parametrize("cls", STYLE_GROUPS, ids=lambda cls: cls.__name__)
+def test_styles_have_no_instance_dict(cls):
+    assert not hasattr(cls(), "__dict__")
+
+
+class CountingTheme(Theme):
+    def __init__(self):
+        super().__init__()
+        self.resolved = 0
+
+    def json_for(self, profile):
+        self.resolved += 1
+        return super().json_for(profile)
+
+
+def test_finalizing_styles_is_idempotent(make_plate):
+    plate = make_plate(theme=CountingTheme())
+    label = plate.add(Label(text="a"), 0, 0, 1, 1)
+    label.styles.set(radius=2).styles.use_profile("floating-button")
+
+    first = label.styles.json
+    for _ in range(3):
+        label.styles.finalize_styles()
+        assert label.styles.json == first
+    assert len(label.styles.styles) == 1
+    assert plate.theme.resolved == 1
+
+
+def test_profiles_are_resolved_again_for_a_new_theme(make_plate):
+    plate = make_plate(theme=CountingTheme())
+    label = plate.add(Label(text="a"), 0, 0, 1, 1).styles.use_profile("default")
+    label.styles.json
+
+    plate.set_theme(CountingTheme())
+    label.styles.json
+    label.styles.json
+    assert plate.theme.resolved == 1
+
+    label.styles.use_profile("floating-panel")
+    assert label.styles.json["radius"] == 10
+    assert plate.theme.resolved == 2
+
+
+def test_style_json_is_a_copy(make_plate):
+    plate = make_plate()
+    label = plate.add(Label(text="a"), 0, 0, 1, 1).styles.set(radius=2)
+    label.styles.json["radius"] = 5
+    assert label.styles.json == {"radius": 2}
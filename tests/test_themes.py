@@ -0,0 +1,39 @@
+import pytest
+
+from openhasp import Label, styling
+from openhasp.themes import Dracula, Theme
+
+
+def test_profile_fragments_are_shared_and_read_only():
+    theme = Theme()
+    fragment = theme.json_for("floating-panel")
+    assert theme.json_for("floating-panel") is fragment
+    with pytest.raises(TypeError):
+        fragment["radius"] = 0
+
+    theme.clear_cache()
+    assert theme.json_for("floating-panel") is not fragment
+    assert Theme().json_for("floating-panel") is not fragment
+
+
+def test_profile_fragments_match_expanded_styles():
+    theme = Dracula()
+    expected = {}
+    for target, styles in theme.styles["navigation"].items():
+        style = styling.ObjectStyle(**styles)
+        for t in target if isinstance(target, tuple) else [target]:
+            style.apply(t)
+        expected.update(style.json)
+
+    assert dict(theme.json_for("navigation")) == expected
+    assert theme.json_for("unknown") == theme.json_for("default")
+
+
+def test_objects_share_profile_fragments(make_plate):
+    plate = make_plate(theme=Dracula())
+    a, b = (
+        plate.add(Label(text=text), 0, i, 1, 1).styles.use_profile("floating-panel")
+        for i, text in enumerate("ab")
+    )
+    assert a.styles.finalize_styles() is b.styles.finalize_styles()
+    assert a.json["radius"] == b.json["radius"] == 10
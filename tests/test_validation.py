@@ -0,0 +1,45 @@
+import pytest
+
+from openhasp import Label, styling, validation
+
+
+def populate(plate):
+    plate.add(Label(text="ok"), 0, 0, 1, 1)
+    label = plate.add(Label(text="bad"), 1, 0, 1, 1)
+    label.x = 1.5
+    label.styles.set(
+        styling.ObjectStylePart.ITEMS, styling.ObjectStyleState.PRESSED, bg_opa=300
+    )
+    return plate
+
+
+def test_style_property():
+    assert styling.style_property("text_font") == "text_font"
+    assert styling.style_property("text_font10") == "text_font"
+    assert styling.style_property("bg_opa") == "bg_opa"
+
+
+def test_violations(make_plate):
+    plate = populate(make_plate(grid=(2, 2)))
+    violations = plate.validate()
+    assert [(v.id, v.path, v.value) for v in violations] == [
+        (2, "x", 1.5),
+        (2, "styles.bg_opa42", 300),
+    ]
+    assert violations[1].message == "must be in range [0, 255]"
+
+
+def test_compacted_plate_has_same_violations(make_plate):
+    expected = populate(make_plate(grid=(2, 2))).validate()
+    plate = populate(make_plate(grid=(2, 2)))
+    plate.compact()
+    assert [(v.id, v.path, v.value) for v in plate.validate()] == [
+        (v.id, v.path, v.value) for v in expected
+    ]
+
+
+def test_raise_errors(make_plate):
+    plate = populate(make_plate(grid=(2, 2)))
+    with pytest.raises(validation.ValidationError) as error:
+        plate.validate(raise_errors=True)
+    assert len(error.value.violations) == 2